@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Benchmark do parser de mensagens
+Compara o MessageParser atual com a implementação original (referência),
+mede o parsing em lote (extract_batch) e o tempo de parsing em mensagens
+adversariais de até 100KB
+"""
+
+import re
+import sys
+import time
+import random
+from pathlib import Path
+
+# Adicionar src ao path
+sys.path.append(str(Path(__file__).parent / 'src'))
+
+def legacy_extract_bet_info(message_text: str):
+    """Implementação original do MessageParser.extract_bet_info (sem logging)"""
+    patterns = {
+        'valor': [
+            r'(?:valor|aposta|stake):\s*R?\$?\s*(\d+(?:[.,]\d{2})?)',
+            r'apostar\s+R?\$?\s*(\d+(?:[.,]\d{2})?)',
+            r'(\d+(?:[.,]\d{2})?)\s*(?:reais|R\$)',
+        ],
+        'link': [
+            r'(https?://[^\s]+)',
+            r'(?:link|url):\s*(https?://[^\s]+)',
+        ],
+        'odds': [
+            r'(?:odd|cotação):\s*(\d+[.,]\d+)',
+            r'@(\d+[.,]\d+)',
+        ],
+        'evento': [
+            r'(?:jogo|partida|evento):\s*([^\n]+)',
+            r'([A-Za-z\s]+\s+x\s+[A-Za-z\s]+)',
+        ]
+    }
+    
+    extracted_info = {}
+    for info_type, pattern_list in patterns.items():
+        for pattern in pattern_list:
+            match = re.search(pattern, message_text, re.IGNORECASE)
+            if match:
+                extracted_info[info_type] = match.group(1).strip()
+                break
+    
+    if 'valor' in extracted_info and 'link' in extracted_info:
+        extracted_info['valor_numerico'] = float(extracted_info['valor'].replace(',', '.'))
+        return extracted_info
+    return None
+
+def build_corpus(size: int = 20000, seed: int = 42, signal_ratio: float = 0.55):
+    """Gera corpus misto de sinais de aposta e conversas comuns do grupo"""
+    rng = random.Random(seed)
+    times = ['Brasil', 'Argentina', 'Flamengo', 'Palmeiras', 'Real Madrid', 'Barcelona', 'Grêmio', 'São Paulo']
+    sites = ['https://sitedeapostas.com/bet/', 'https://bet365.com/link/', 'http://sportingbet.com/']
+    chatter = [
+        "Bom dia pessoal! Hoje tem rodada cheia 🔥",
+        "Green! Mais uma batida ✅✅",
+        "Alguém viu o jogo de ontem? Que virada",
+        "Lembrem da gestão de banca, nada de all-in",
+        "Red infelizmente, faz parte. Amanhã tem mais",
+        "Próxima entrada em 10 minutos, fiquem atentos",
+    ]
+    
+    corpus = []
+    for _ in range(size):
+        home, away = rng.sample(times, 2)
+        valor = f"{rng.randint(5, 200)},{rng.randint(0, 99):02d}"
+        odd = f"{rng.uniform(1.2, 5.0):.2f}"
+        link = f"{rng.choice(sites)}{rng.randint(1000, 99999)}"
+        kind = rng.random()
+        if kind < signal_ratio:
+            kind *= 0.55 / signal_ratio
+        else:
+            kind = 1.0
+        
+        if kind < 0.25:
+            text = f"Jogo: {home} x {away}\nValor: R$ {valor}\nOdd: {odd}\n{link}"
+        elif kind < 0.40:
+            text = f"Apostar R$ {valor.split(',')[0]} em {home}\n@{odd}\n{link}"
+        elif kind < 0.50:
+            text = f"{home} x {away}\nStake: {valor}\nLink: {link}"
+        elif kind < 0.55:
+            text = f"Entrada {home} x {away} {valor} reais cotação: {odd} {link}"
+        else:
+            text = rng.choice(chatter) + (f" {home} x {away}" if rng.random() < 0.3 else "")
+        corpus.append(text)
+    return corpus
+
+def build_stress_corpus(size_bytes: int):
+    """Mensagens patológicas para regex com backtracking (sem separador, espaços e dígitos longos)"""
+    unit_count = max(1, size_bytes // 10)
+    return {
+        'letras sem " x "': ('abc def gh' * unit_count)[:size_bytes],
+        'espaços após valor': ('valor:' + ' ' * size_bytes)[:size_bytes],
+        'dígitos sem reais': ('1234567890' * unit_count)[:size_bytes],
+        'muitos @': ('@1' * (size_bytes // 2 + 1))[:size_bytes],
+        'x sem evento': ('a x ' * (size_bytes // 4 + 1))[:size_bytes],
+    }
+
+def build_fuzz_corpus(size: int = 5000, seed: int = 7):
+    """Strings curtas aleatórias com os tokens relevantes para os padrões"""
+    rng = random.Random(seed)
+    tokens = ['a', 'Brasil', ' ', '  ', '\n', 'x', ' x ', '1', '25', ',', '.', '50,00', '@', '@1.5',
+              ':', 'R$', 'R', '$', 'valor', 'Stake:', 'apostar', 'reais', 'odd:', 'jogo:', 'http://s.com/1']
+    return [''.join(rng.choice(tokens) for _ in range(rng.randint(1, 12))) for _ in range(size)]
+
+def run_stress(sizes=(1_000, 10_000, 50_000, 100_000)) -> bool:
+    """Tempo por KB deve se manter estável com o tamanho da mensagem (parsing linear)"""
+    from utils import CompiledMessageParser
+    
+    parser = CompiledMessageParser(max_length=None)
+    print("\nMensagens adversariais (sem limite de tamanho):")
+    print(f"{'caso':<22}" + ''.join(f"{size // 1000:>9}KB" for size in sizes) + "   (µs/KB)")
+    
+    flat = True
+    by_case = {}
+    for size in sizes:
+        for name, text in build_stress_corpus(size).items():
+            by_case.setdefault(name, []).append((size, text))
+    
+    for name, samples in by_case.items():
+        per_kb = []
+        for size, text in samples:
+            start = time.perf_counter()
+            parser.parse(text)
+            per_kb.append((time.perf_counter() - start) * 1e6 / (size / 1000))
+        print(f"{name:<22}" + ''.join(f"{value:>11.1f}" for value in per_kb))
+        # Crescimento quadrático multiplicaria o custo por KB por ~100x entre 1KB e 100KB
+        if per_kb[-1] > max(per_kb[0], 1.0) * 10:
+            flat = False
+    
+    text = build_stress_corpus(5_000)['letras sem " x "']
+    start = time.perf_counter()
+    legacy_extract_bet_info(text)
+    print(f"Original com 5KB sem ' x ': {(time.perf_counter() - start) * 1000:.0f}ms")
+    
+    if not flat:
+        print("❌ Custo por KB cresce com o tamanho da mensagem")
+    return flat
+
+def measure(func, corpus, repeat: int = 3) -> float:
+    """Retorna mensagens por segundo (melhor de N execuções)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in corpus:
+            func(text)
+        best = min(best, time.perf_counter() - start)
+    return len(corpus) / best
+
+def check_equivalence(corpus) -> int:
+    """Compara resultados do parser atual com a referência; retorna divergências"""
+    from utils import MessageParser
+    
+    mismatches = 0
+    for text in corpus:
+        expected = legacy_extract_bet_info(text)
+        actual = MessageParser.compiled.parse(text)
+        if expected != actual:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"❌ Divergência: {text[:80]!r}\n   esperado={expected}\n   obtido={actual}")
+    return mismatches
+
+def check_batch_equivalence(corpus) -> int:
+    """Compara parse_batch com parse linha a linha; retorna divergências"""
+    import math
+    from utils import MessageParser
+    
+    result = MessageParser.compiled.parse_batch(corpus)
+    mismatches = 0
+    for text, row in zip(corpus, result.itertuples(index=False)):
+        expected = MessageParser.compiled.parse(text)
+        if expected is None:
+            ok = not row.parse_ok and row.link is None
+        else:
+            odds = float(expected['odds'].replace(',', '.')) if 'odds' in expected else None
+            ok = (
+                row.parse_ok
+                and row.valor_numerico == expected['valor_numerico']
+                and row.link == expected['link']
+                and (row.odds == odds if odds is not None else math.isnan(row.odds))
+                and row.evento == expected.get('evento')
+            )
+        if not ok:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"❌ Divergência no lote: {text[:80]!r}\n   esperado={expected}\n   obtido={row}")
+    return mismatches
+
+def run_batch(size: int = 200_000) -> bool:
+    """Throughput de parse_batch (DataFrame) contra parse linha a linha, por densidade de sinais"""
+    from utils import MessageParser
+    
+    mismatches = check_batch_equivalence(build_corpus(size=5000, seed=3)) + check_batch_equivalence(build_fuzz_corpus())
+    if mismatches:
+        print(f"❌ {mismatches} divergências no parsing em lote")
+        return False
+    print("\n✅ Parsing em lote idêntico ao parsing por mensagem")
+    
+    for signal_ratio in (0.05, 0.30, 0.55, 0.90):
+        corpus = build_corpus(size=size, seed=11, signal_ratio=signal_ratio)
+        row_rate = measure(MessageParser.compiled.parse, corpus, repeat=1)
+        start = time.perf_counter()
+        MessageParser.compiled.parse_batch(corpus)
+        batch_rate = len(corpus) / (time.perf_counter() - start)
+        print(f"Lote ({signal_ratio:.0%} sinais): {batch_rate:>10,.0f} msg/s  (por mensagem: {row_rate:,.0f} msg/s)")
+    return True
+
+def main():
+    from utils import MessageParser
+    
+    print("="*60)
+    print("    BENCHMARK DO PARSER DE MENSAGENS")
+    print("="*60)
+    
+    corpus = build_corpus()
+    print(f"Corpus: {len(corpus)} mensagens")
+    
+    mismatches = check_equivalence(corpus)
+    if mismatches:
+        print(f"❌ {mismatches} divergências em relação à implementação original")
+        return False
+    print("✅ Resultados idênticos à implementação original")
+    
+    fuzz_mismatches = check_equivalence(build_fuzz_corpus())
+    if fuzz_mismatches:
+        print(f"❌ {fuzz_mismatches} divergências no corpus aleatório")
+        return False
+    print("✅ Corpus aleatório idêntico à implementação original")
+    
+    legacy_rate = measure(legacy_extract_bet_info, corpus)
+    compiled_rate = measure(MessageParser.compiled.parse, corpus)
+    
+    print(f"Original:   {legacy_rate:>12,.0f} msg/s")
+    print(f"Compilado:  {compiled_rate:>12,.0f} msg/s  ({compiled_rate / legacy_rate:.2f}x)")
+    return run_batch() and run_stress()
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
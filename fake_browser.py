@@ -0,0 +1,366 @@
+"""
+Navegador falso para os testes dos scripts JS do sistema (test_system.py).
+Requer o node no PATH; sem ele os testes de JS são ignorados (require_node).
+"""
+
+import json
+import shutil
+import unittest
+import subprocess
+
+from selenium.common.exceptions import JavascriptException
+
+# Navegador falso para os testes dos scripts JS: um processo node com um DOM
+# mínimo (seletores CSS simples, MutationObserver, timers reais) que executa os
+# scripts como o execute_script/execute_async_script do Selenium
+FAKE_BROWSER_JS = r"""
+const readline = require('readline');
+
+let nextId = 1;
+const handles = new Map();
+const observers = [];
+globalThis.matchCalls = 0;
+
+const compiled = new Map();
+const COMPOUND = /^(?:\*|([a-zA-Z][\w-]*)|\.([\w-]+)|#([\w-]+)|\[([\w-]+)(?:([*^$]?=)["']?([^"'\]]*)["']?)?\])/;
+const parseCompound = (text, selector) => {
+    const parts = [];
+    let rest = text;
+    while (rest.length) {
+        const m = rest.match(COMPOUND);
+        if (!m) { throw new SyntaxError(`'${selector}' is not a valid selector`); }
+        parts.push(m);
+        rest = rest.slice(m[0].length);
+    }
+    return (el) => parts.every((m) => {
+        if (m[0] === '*') { return true; }
+        if (m[1]) { return el.tag === m[1].toLowerCase(); }
+        if (m[2]) { return el.classList.includes(m[2]); }
+        if (m[3]) { return el.id === m[3]; }
+        const value = el.getAttribute(m[4]);
+        if (value === null) { return false; }
+        if (!m[5]) { return true; }
+        if (m[5] === '=') { return value === m[6]; }
+        if (m[5] === '*=') { return value.includes(m[6]); }
+        if (m[5] === '^=') { return value.startsWith(m[6]); }
+        return value.endsWith(m[6]);
+    });
+};
+const compile = (selector) => {
+    if (!compiled.has(selector)) {
+        compiled.set(selector, selector.split(',').map((one) => one.trim().split(/\s+/).map((part) => parseCompound(part, selector))));
+    }
+    return compiled.get(selector);
+};
+
+const notify = (target, record) => {
+    for (const observer of observers) {
+        const options = observer.options;
+        if (record.type === 'childList' && !options.childList) { continue; }
+        if (record.type === 'attributes' && !options.attributes) { continue; }
+        if (observer.target !== target && !(options.subtree && observer.target.contains(target))) { continue; }
+        observer.records.push(record);
+        if (!observer.scheduled) {
+            observer.scheduled = true;
+            queueMicrotask(() => {
+                observer.scheduled = false;
+                const records = observer.records.splice(0);
+                if (records.length && observers.includes(observer)) { observer.callback(records, observer); }
+            });
+        }
+    }
+};
+
+class Element {
+    constructor(tag, attrs = {}, text = '') {
+        this.nodeType = 1;
+        this.tag = tag.toLowerCase();
+        this.tagName = tag.toUpperCase();
+        this.attrs = {};
+        for (const key in attrs) { this.attrs[key] = String(attrs[key]); }
+        this.text = text;
+        this.children = [];
+        this.parentElement = null;
+        this.style = {display: 'block', visibility: 'visible'};
+        this.disabled = false;
+        this.clicks = 0;
+        this.value = '';
+        this.scrollTop = 0;
+        this.scrollHeight = 0;
+        this.clientHeight = 0;
+        this.__id = nextId++;
+    }
+    get id() { return this.attrs.id || ''; }
+    get href() { return this.attrs.href || ''; }
+    get classList() { return (this.attrs['class'] || '').split(/\s+/).filter(Boolean); }
+    get lastElementChild() { return this.children.length ? this.children[this.children.length - 1] : null; }
+    get previousElementSibling() {
+        const siblings = this.parentElement ? this.parentElement.children : [];
+        const index = siblings.indexOf(this);
+        return index > 0 ? siblings[index - 1] : null;
+    }
+    get innerText() { return this.text + this.children.map((child) => child.innerText).join(''); }
+    get outerHTML() {
+        const attrs = Object.entries(this.attrs).map(([key, value]) => ` ${key}="${value}"`).join('');
+        return `<${this.tag}${attrs}>${this.text}${this.children.map((child) => child.outerHTML).join('')}</${this.tag}>`;
+    }
+    getAttribute(name) { return name in this.attrs ? this.attrs[name] : null; }
+    setAttribute(name, value) {
+        this.attrs[name] = String(value);
+        notify(this, {type: 'attributes', target: this, addedNodes: []});
+    }
+    appendChild(child) {
+        if (child.parentElement) { child.remove(); }
+        child.parentElement = this;
+        this.children.push(child);
+        notify(this, {type: 'childList', target: this, addedNodes: [child]});
+        return child;
+    }
+    remove() {
+        const parent = this.parentElement;
+        if (!parent) { return; }
+        parent.children.splice(parent.children.indexOf(this), 1);
+        this.parentElement = null;
+        notify(parent, {type: 'childList', target: parent, addedNodes: []});
+    }
+    contains(node) {
+        while (node) {
+            if (node === this) { return true; }
+            node = node.parentElement;
+        }
+        return false;
+    }
+    matches(selector) {
+        globalThis.matchCalls++;
+        return compile(selector).some((chain) => {
+            if (!chain[chain.length - 1](this)) { return false; }
+            let node = this.parentElement;
+            for (let i = chain.length - 2; i >= 0; i--) {
+                while (node && !chain[i](node)) { node = node.parentElement; }
+                if (!node) { return false; }
+                node = node.parentElement;
+            }
+            return true;
+        });
+    }
+    closest(selector) {
+        let node = this;
+        while (node) {
+            if (node.matches(selector)) { return node; }
+            node = node.parentElement;
+        }
+        return null;
+    }
+    querySelectorAll(selector) {
+        compile(selector);
+        const found = [];
+        const visit = (node) => {
+            for (const child of node.children) {
+                if (child.matches(selector)) { found.push(child); }
+                visit(child);
+            }
+        };
+        visit(this);
+        return found;
+    }
+    querySelector(selector) {
+        compile(selector);
+        const visit = (node) => {
+            for (const child of node.children) {
+                if (child.matches(selector)) { return child; }
+                const found = visit(child);
+                if (found) { return found; }
+            }
+            return null;
+        };
+        return visit(this);
+    }
+    getElementsByTagName(tag) { return this.querySelectorAll(tag); }
+    getBoundingClientRect() {
+        const hidden = this.style.display === 'none';
+        return {width: hidden ? 0 : 100, height: hidden ? 0 : 20};
+    }
+    click() { this.clicks++; }
+}
+
+// el('div', {class: 'message'}, 'texto', el(...), ...)
+globalThis.el = (tag, attrs = {}, ...content) => {
+    const element = new Element(tag, attrs);
+    for (const item of content) {
+        if (item instanceof Element) { element.appendChild(item); } else { element.text += String(item); }
+    }
+    return element;
+};
+
+const listeners = {};
+const html = new Element('html');
+const body = html.appendChild(new Element('body'));
+globalThis.document = {
+    documentElement: html,
+    body: body,
+    title: 'Fake',
+    readyState: 'complete',
+    querySelector: (selector) => html.querySelector(selector),
+    querySelectorAll: (selector) => html.querySelectorAll(selector),
+    getElementsByTagName: (tag) => tag === '*' ? [html, ...html.querySelectorAll('*')] : html.querySelectorAll(tag),
+    addEventListener: (type, listener) => { (listeners[type] = listeners[type] || []).push(listener); },
+};
+globalThis.setReadyState = (state) => {
+    document.readyState = state;
+    for (const listener of listeners.readystatechange || []) { listener(); }
+};
+globalThis.window = globalThis;
+globalThis.location = {href: 'https://fake.test/'};
+globalThis.Node = {ELEMENT_NODE: 1};
+globalThis.getComputedStyle = (element) => element.style;
+globalThis.MutationObserver = class {
+    constructor(callback) { this.callback = callback; this.records = []; this.scheduled = false; }
+    observe(target, options) { this.target = target; this.options = options; observers.push(this); }
+    disconnect() {
+        const index = observers.indexOf(this);
+        if (index >= 0) { observers.splice(index, 1); }
+    }
+    takeRecords() { return this.records.splice(0); }
+};
+
+const serialize = (value) => {
+    if (value instanceof Element) {
+        handles.set(value.__id, value);
+        return {__element__: value.__id};
+    }
+    if (Array.isArray(value)) { return value.map(serialize); }
+    // Objetos do ambiente (timers, canais) não são serializáveis
+    if (value && typeof value === 'object' && Object.getPrototypeOf(value) !== Object.prototype) { return null; }
+    if (value && typeof value === 'object') {
+        const result = {};
+        for (const key of Object.keys(value)) { result[key] = serialize(value[key]); }
+        return result;
+    }
+    return value === undefined || typeof value === 'function' ? null : value;
+};
+const deserialize = (value) => {
+    if (Array.isArray(value)) { return value.map(deserialize); }
+    if (value && typeof value === 'object') {
+        if ('__element__' in value) { return handles.get(value.__element__); }
+        const result = {};
+        for (const key of Object.keys(value)) { result[key] = deserialize(value[key]); }
+        return result;
+    }
+    return value;
+};
+
+const run = (command) => {
+    if (command.op === 'eval') { return (0, eval)(command.code); }
+    const args = deserialize(command.args);
+    const script = new Function(command.script);
+    if (!command.async) { return script.apply(null, args); }
+    return new Promise((resolve, reject) => {
+        const timer = setTimeout(() => reject(new Error('script timeout')), command.timeout);
+        script.apply(null, [...args, (result) => { clearTimeout(timer); resolve(result); }]);
+    });
+};
+
+const pending = [];
+let busy = false;
+const pump = async () => {
+    if (busy) { return; }
+    busy = true;
+    while (pending.length) {
+        const command = JSON.parse(pending.shift());
+        let reply;
+        try {
+            reply = {ok: true, value: serialize(await run(command))};
+        } catch (e) {
+            reply = {ok: false, error: String(e && e.message || e)};
+        }
+        process.stdout.write(JSON.stringify(reply) + '\n');
+    }
+    busy = false;
+};
+readline.createInterface({input: process.stdin})
+    .on('line', (line) => { pending.push(line); pump(); })
+    .on('close', () => process.exit(0));
+"""
+
+class FakeBrowserElement:
+    """Referência a um elemento do navegador falso"""
+    
+    def __init__(self, browser, element_id):
+        self.browser = browser
+        self.element_id = element_id
+    
+    def click(self):
+        self.browser.execute_script("arguments[0].click();", self)
+
+class FakeBrowser:
+    """Driver Selenium falso: executa os scripts no node contra o DOM simulado"""
+    
+    def __init__(self, setup: str = ''):
+        if not shutil.which('node'):
+            raise RuntimeError("node não encontrado")
+        self.process = subprocess.Popen(['node', '-e', FAKE_BROWSER_JS], stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, text=True)
+        self.script_timeout = 30
+        self.current_url = 'https://fake.test/'
+        if setup:
+            self.eval(setup)
+    
+    def _call(self, **command):
+        
+        def encode(value):
+            if isinstance(value, FakeBrowserElement):
+                return {'__element__': value.element_id}
+            raise TypeError(type(value))
+        
+        self.process.stdin.write(json.dumps(command, default=encode) + '\n')
+        self.process.stdin.flush()
+        reply = json.loads(self.process.stdout.readline())
+        if not reply['ok']:
+            raise JavascriptException(reply['error'])
+        return self._wrap(reply['value'])
+    
+    def _wrap(self, value):
+        if isinstance(value, list):
+            return [self._wrap(item) for item in value]
+        if isinstance(value, dict):
+            if '__element__' in value:
+                return FakeBrowserElement(self, value['__element__'])
+            return {key: self._wrap(item) for key, item in value.items()}
+        return value
+    
+    def eval(self, code: str):
+        """Executa código de preparação no escopo global da página"""
+        return self._call(op='eval', code=code)
+    
+    def execute_script(self, script, *args):
+        return self._call(op='exec', script=script, args=list(args))
+    
+    def execute_async_script(self, script, *args):
+        return self._call(op='exec', script=script, args=list(args), timeout=self.script_timeout * 1000, **{'async': True})
+    
+    def set_script_timeout(self, seconds):
+        self.script_timeout = seconds
+    
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait(timeout=10)
+
+# Chat do Telegram Web simulado: bolhas com data-mid em .bubbles, no layout
+# [data-testid="Message"] (os dois primeiros MESSAGE_SELECTORS não existem nele)
+FAKE_CHAT_JS = """
+globalThis.chat = document.body.appendChild(el('div', {class: 'bubbles'}));
+globalThis.bubble = (mid, text) => el('div', {'data-mid': mid, 'data-timestamp': 1704103200 + mid, class: 'bubble'},
+    el('div', {'data-testid': 'Message'}, el('div', {class: 'text-content'}, text), el('a', {href: 'https://site.com/bet/' + mid})),
+    el('span', {class: 'time'}, '12:00'));
+globalThis.fillChat = (first, last) => {
+    for (let mid = first; mid <= last; mid++) { chat.appendChild(bubble(mid, 'Stake: 10 #' + mid)); }
+};
+"""
+
+def require_node():
+    """
+    Os testes de JS precisam do node (ver requirements.txt): sem ele o teste é
+    marcado como ignorado (unittest.SkipTest, reconhecido também pelo pytest)
+    """
+    if not shutil.which('node'):
+        raise unittest.SkipTest("node não encontrado, teste de JS ignorado")
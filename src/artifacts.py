@@ -0,0 +1,130 @@
+
+import base64
+import queue
+import itertools
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+from loguru import logger
+
+from config import Config
+
+# Extensões gerenciadas pela retenção do diretório de screenshots
+ARTIFACT_EXTENSIONS = ('.png', '.jpg')
+
+class ArtifactWriter:
+    """
+    Gravação de screenshots em segundo plano. O executor entrega os bytes
+    capturados (base64, como o navegador devolve) e segue; a thread de gravação
+    decodifica, grava com nome único e aplica a retenção por quantidade e bytes,
+    apagando os arquivos mais antigos. Com a fila cheia o artefato é descartado
+    em vez de bloquear a aposta.
+    """
+    
+    def __init__(self, directory: str, max_files: int = None, max_mb: float = None, queue_size: int = 32):
+        self.directory = Path(directory)
+        self.max_files = Config.SCREENSHOT_MAX_FILES if max_files is None else max_files
+        self.max_bytes = int((Config.SCREENSHOT_MAX_MB if max_mb is None else max_mb) * 1024 * 1024)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._sequence = itertools.count(1)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._files = deque()
+        self._total_bytes = 0
+        self.dropped = 0
+    
+    def unique_path(self, filename: str) -> Path:
+        """Nome único: o nome pedido + horário + sequência (nada é sobrescrito)"""
+        name = Path(filename)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        return self.directory / f"{name.stem}_{stamp}_{next(self._sequence):04d}{name.suffix or '.png'}"
+    
+    def submit(self, data_base64: str, filename: str) -> Optional[str]:
+        """Enfileira o artefato e retorna o caminho em que será gravado (None se descartado)"""
+        self._ensure_started()
+        path = self.unique_path(filename)
+        try:
+            self._queue.put_nowait((path, data_base64))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            logger.warning(f"Fila de screenshots cheia, artefato descartado: {path.name}")
+            return None
+        return str(path)
+    
+    def _ensure_started(self):
+        """Inicia a thread de gravação no primeiro uso"""
+        with self._lock:
+            if self._thread:
+                return
+            self._thread = threading.Thread(target=self._writer_loop, name="artifact-writer", daemon=True)
+            self._thread.start()
+    
+    def _scan(self):
+        """Arquivos existentes no diretório, do mais antigo para o mais novo"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = [
+            (path, path.stat())
+            for path in self.directory.iterdir()
+            if path.is_file() and path.suffix in ARTIFACT_EXTENSIONS
+        ]
+        files.sort(key=lambda item: item[1].st_mtime)
+        self._files = deque((path, stat.st_size) for path, stat in files)
+        self._total_bytes = sum(size for _, size in self._files)
+    
+    def _writer_loop(self):
+        """Grava os artefatos enfileirados"""
+        self._scan()
+        self._enforce_retention()
+        
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._write(*item)
+            except Exception as e:
+                logger.error(f"Erro ao gravar screenshot: {e}")
+            finally:
+                self._queue.task_done()
+    
+    def _write(self, path: Path, data_base64: str):
+        """Decodifica, grava e aplica a retenção"""
+        data = base64.b64decode(data_base64)
+        path.write_bytes(data)
+        self._files.append((path, len(data)))
+        self._total_bytes += len(data)
+        logger.info(f"Screenshot salvo: {path} ({len(data) / 1024:.0f} KB)")
+        self._enforce_retention()
+    
+    def _enforce_retention(self):
+        """Apaga os arquivos mais antigos acima de max_files ou max_bytes"""
+        while self._files and (len(self._files) > self.max_files or self._total_bytes > self.max_bytes):
+            path, size = self._files.popleft()
+            self._total_bytes -= size
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+    
+    def usage(self) -> Dict:
+        """Quantidade e bytes dos artefatos mantidos"""
+        return {'files': len(self._files), 'bytes': self._total_bytes, 'dropped': self.dropped}
+    
+    def flush(self):
+        """Aguarda a gravação dos artefatos enfileirados"""
+        if self._thread:
+            self._queue.join()
+    
+    def close(self):
+        """Grava o que estiver na fila e encerra a thread"""
+        if not self._thread:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=30)
+        self._thread = None
+
+# Instância global compartilhada por todos os componentes
+artifact_writer = ArtifactWriter(Config.SCREENSHOT_DIR)
@@ -1,25 +1,31 @@
 
 import time
-import re
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from loguru import logger
 
 from browser_manager import BrowserManager
-from utils import SessionManager, ElementWaiter, human_like_delay, take_screenshot, validate_bet_amount, RetryHelper
+from bet_ledger import SUBMITTED
+from clock import clock
+from retry_policy import Deadline, DeadlineExceeded
+from utils import SessionManager, SelectorCache, ElementWaiter, human_like_delay, take_screenshot, validate_bet_amount
 from config import Config
+from tracing import tracer
 
 class BetExecutor:
     """Classe para executar apostas automaticamente"""
     
-    def __init__(self):
-        self.browser_manager = BrowserManager("betting_profile")
-        self.session_manager = SessionManager("betting_session.json")
+    def __init__(self, profile_name: str = "betting_profile", session_file: Optional[str] = None):
+        self.browser_manager = BrowserManager(profile_name)
+        self.session_manager = SessionManager(session_file or Config.BET_SESSION_FILE)
+        self.selector_cache = SelectorCache(Config.SELECTOR_CACHE_FILE)
         self.is_logged_in = False
+        self.session_started_at = None
+        self.last_verified_at = None
+        self.ledger = None
+        self.browser_failed = False
         self.bet_site_domain = self._extract_domain(Config.BET_SITE_BASE_URL)
     
     def _extract_domain(self, url: str) -> str:
@@ -31,6 +37,7 @@ class BetExecutor:
         except:
             return url
     
+    @tracer.traced('executor.login')
     def login(self) -> bool:
         """Realiza login no site de apostas"""
         try:
@@ -47,7 +54,7 @@ class BetExecutor:
                 
                 if self._check_login_status():
                     logger.info("Login realizado com sessão salva")
-                    self.is_logged_in = True
+                    self._mark_session_started()
                     return True
             
             # Se não conseguiu com sessão salva, fazer login manual
@@ -85,32 +92,27 @@ class BetExecutor:
                 'input[placeholder*="senha"]'
             ]
             
-            # Encontrar campo de usuário
-            username_field = None
-            for selector in username_selectors:
-                try:
-                    username_field = waiter.wait_for_element(By.CSS_SELECTOR, selector, 5)
-                    logger.info(f"Campo de usuário encontrado: {selector}")
-                    break
-                except TimeoutException:
-                    continue
-            
-            if not username_field:
+            # Encontrar campo de usuário (todos os candidatos testados em paralelo na página)
+            selector, username_field = waiter.wait_for_any(
+                self.selector_cache.ordered(self.bet_site_domain, 'login_username', username_selectors),
+                Config.ELEMENT_PROBE_TIMEOUT_SECONDS
+            )
+            if username_field:
+                logger.info(f"Campo de usuário encontrado: {selector}")
+                self.selector_cache.record(self.bet_site_domain, 'login_username', selector)
+            else:
                 logger.error("Campo de usuário não encontrado")
                 take_screenshot(driver, "login_username_not_found.png")
                 return False
             
             # Encontrar campo de senha
-            password_field = None
-            for selector in password_selectors:
-                try:
-                    password_field = driver.find_element(By.CSS_SELECTOR, selector)
-                    logger.info(f"Campo de senha encontrado: {selector}")
-                    break
-                except NoSuchElementException:
-                    continue
-            
-            if not password_field:
+            selector, password_field = waiter.wait_for_any(
+                self.selector_cache.ordered(self.bet_site_domain, 'login_password', password_selectors), 0
+            )
+            if password_field:
+                logger.info(f"Campo de senha encontrado: {selector}")
+                self.selector_cache.record(self.bet_site_domain, 'login_password', selector)
+            else:
                 logger.error("Campo de senha não encontrado")
                 take_screenshot(driver, "login_password_not_found.png")
                 return False
@@ -136,14 +138,9 @@ class BetExecutor:
                 'button:contains("Login")'
             ]
             
-            login_button = None
-            for selector in login_button_selectors:
-                try:
-                    login_button = driver.find_element(By.CSS_SELECTOR, selector)
-                    logger.info(f"Botão de login encontrado: {selector}")
-                    break
-                except NoSuchElementException:
-                    continue
+            selector, login_button = waiter.wait_for_any(login_button_selectors, 0)
+            if login_button:
+                logger.info(f"Botão de login encontrado: {selector}")
             
             if not login_button:
                 # Tentar enviar Enter no campo de senha
@@ -160,7 +157,7 @@ class BetExecutor:
             if self._check_login_status():
                 logger.info("Login realizado com sucesso")
                 self.session_manager.save_cookies(driver)
-                self.is_logged_in = True
+                self._mark_session_started()
                 return True
             else:
                 logger.error("Falha no login - não foi possível confirmar")
@@ -172,6 +169,70 @@ class BetExecutor:
             take_screenshot(self.browser_manager.get_driver(), "login_error.png")
             return False
     
+    def _mark_session_started(self):
+        """Registra início de uma sessão válida"""
+        self.is_logged_in = True
+        self.session_started_at = clock.time()
+        self.last_verified_at = self.session_started_at
+    
+    def session_needs_refresh(self, margin_seconds: float = 0) -> bool:
+        """
+        Sessão sem login ou sem atividade há tempo suficiente para o site
+        encerrá-la (SESSION_IDLE_TIMEOUT_MINUTES) nos próximos margin_seconds
+        """
+        if not self.is_logged_in or self.last_verified_at is None:
+            return True
+        idle_seconds = clock.time() - self.last_verified_at
+        return idle_seconds >= Config.SESSION_IDLE_TIMEOUT_MINUTES * 60 - margin_seconds
+    
+    def verify_session(self, should_abort: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        Verifica se a sessão ainda está ativa (keep-alive) e refaz o login se expirou.
+        Deve ser chamado apenas com o executor ocioso. should_abort é consultado
+        antes da navegação e antes de refazer o login: se um sinal estiver
+        esperando, a verificação é abandonada (o login fica para a aposta).
+        """
+        self.browser_failed = False
+        should_abort = should_abort or (lambda: False)
+        try:
+            if should_abort():
+                return False
+            
+            driver = self.browser_manager.get_driver()
+            driver.get(Config.BET_SITE_BASE_URL)
+            self.browser_manager.wait_for_page_load()
+            
+            if self.is_logged_in and self._check_login_status():
+                self.last_verified_at = clock.time()
+                # Renovar cookies salvos com a sessão atualizada
+                self.session_manager.save_cookies(driver)
+                logger.debug(f"Sessão verificada - idade {self.get_session_info()['session_age_seconds']:.0f}s")
+                return True
+            
+            self.is_logged_in = False
+            if should_abort():
+                logger.info("Sessão expirada, login adiado para a próxima aposta (sinal aguardando)")
+                return False
+            
+            logger.warning("Sessão do site de apostas expirada, refazendo login...")
+            if self.login():
+                return True
+            
+        except Exception as e:
+            logger.error(f"Erro no keep-alive da sessão: {e}")
+        
+        self.browser_failed = not self.browser_manager.is_responsive()
+        return False
+    
+    def get_session_info(self) -> Dict:
+        """Idade da sessão e tempo desde a última verificação"""
+        now = clock.time()
+        return {
+            'logged_in': self.is_logged_in,
+            'session_age_seconds': now - self.session_started_at if self.session_started_at else None,
+            'last_verified_seconds_ago': now - self.last_verified_at if self.last_verified_at else None,
+        }
+    
     def _check_login_status(self) -> bool:
         """Verifica se está logado no site de apostas"""
         try:
@@ -190,16 +251,7 @@ class BetExecutor:
                 '.saldo'
             ]
             
-            for selector in logged_in_indicators:
-                try:
-                    elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                    if elements:
-                        logger.info(f"Login confirmado - encontrado: {selector}")
-                        return True
-                except:
-                    continue
-            
-            # Verificar se ainda está na página de login
+            # Indicadores de que ainda está na página de login
             login_indicators = [
                 'input[name="username"]',
                 'input[name="password"]',
@@ -207,14 +259,16 @@ class BetExecutor:
                 '.auth-form'
             ]
             
-            for selector in login_indicators:
-                try:
-                    elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                    if elements:
-                        logger.info(f"Ainda na página de login - encontrado: {selector}")
-                        return False
-                except:
-                    continue
+            # Uma única verificação na página; indicadores de sucesso têm prioridade
+            selector, _ = ElementWaiter(driver).wait_for_any(logged_in_indicators + login_indicators, 0)
+            
+            if selector in logged_in_indicators:
+                logger.info(f"Login confirmado - encontrado: {selector}")
+                return True
+            
+            if selector in login_indicators:
+                logger.info(f"Ainda na página de login - encontrado: {selector}")
+                return False
             
             # Se não encontrou indicadores claros, assumir que está logado
             return True
@@ -223,8 +277,28 @@ class BetExecutor:
             logger.error(f"Erro ao verificar status de login: {e}")
             return False
     
+    @tracer.traced('executor.execute_bet')
     def execute_bet(self, bet_info: Dict) -> bool:
-        """Executa uma aposta baseada nas informações fornecidas"""
+        """
+        Executa uma aposta; em caso de falha grava o flight recorder do navegador
+        e marca browser_failed se o navegador parou de responder. Falhas da
+        aposta em si (prazo vencido, link ou valor inválidos, elemento não
+        encontrado) mantêm o navegador, que continua em uso.
+        """
+        self.browser_failed = False
+        success = self._place_bet(bet_info)
+        if not success:
+            self.browser_manager.dump_flight_recorder('bet_failed')
+            self.browser_failed = not self.browser_manager.is_responsive()
+        return success
+    
+    def _place_bet(self, bet_info: Dict) -> bool:
+        """
+        Executa uma aposta baseada nas informações fornecidas. O prazo do sinal
+        é conferido a cada etapa até o clique em confirmar; vencido, a aposta é
+        abandonada e o motivo fica em bet_info['abandoned'].
+        """
+        deadline = Deadline.for_signal(bet_info)
         try:
             if not self.is_logged_in:
                 logger.error("Não está logado no site de apostas")
@@ -245,14 +319,20 @@ class BetExecutor:
             bet_amount = validate_bet_amount(bet_amount, Config.MIN_BET_AMOUNT, Config.MAX_BET_AMOUNT)
             
             logger.info(f"Executando aposta - Link: {bet_link}, Valor: R$ {bet_amount}")
+            # Antes do clique em confirmar só URL e título (o HTML é capturado depois do
+            # clique ou na falha), a menos que FLIGHT_RECORDER_PRE_CLICK_DOM esteja ativo
+            pre_click_dom = Config.FLIGHT_RECORDER_PRE_CLICK_DOM
+            self.browser_manager.record_step('bet_start', dom=pre_click_dom, link=bet_link, amount=bet_amount)
             
             # Navegar para o link da aposta
-            if not self.browser_manager.navigate_with_retry(bet_link):
+            deadline.check('navegação')
+            if not self.browser_manager.navigate_with_retry(bet_link, deadline=deadline):
                 logger.error("Falha ao navegar para link da aposta")
                 return False
             
             # Aguardar página carregar
             self.browser_manager.wait_for_page_load()
+            self.browser_manager.record_step('page_loaded', dom=pre_click_dom)
             
             # Lidar com Cloudflare se necessário
             if not self.browser_manager.handle_cloudflare():
@@ -260,24 +340,40 @@ class BetExecutor:
                 return False
             
             # Procurar campo de valor da aposta
+            deadline.check('preenchimento do valor')
             if not self._fill_bet_amount(bet_amount):
                 logger.error("Falha ao preencher valor da aposta")
                 return False
+            self.browser_manager.record_step('amount_filled', dom=pre_click_dom)
             
-            # Confirmar aposta
-            if not self._confirm_bet():
+            # Confirmar aposta (último ponto em que a aposta pode ser abandonada)
+            deadline.check('confirmação')
+            if not self._confirm_bet(bet_info.get('idempotency_key')):
                 logger.error("Falha ao confirmar aposta")
                 return False
             
             logger.info("Aposta executada com sucesso!")
-            take_screenshot(driver, f"bet_success_{int(time.time())}.png")
+            # Aposta confirmada também comprova (e mantém) a sessão ativa
+            self.last_verified_at = clock.time()
+            self.browser_manager.record_step('bet_confirmed')
+            if bet_info.get('detected_at'):
+                tracer.record('signal.detection_to_confirmation', clock.time() - bet_info['detected_at'])
+            take_screenshot(driver, "bet_success.png")
             return True
+        
+        except DeadlineExceeded as e:
+            logger.warning(f"Aposta abandonada - {e}")
+            bet_info['abandoned'] = str(e)
+            if bet_info.get('detected_at'):
+                tracer.record('signal.abandoned', clock.time() - bet_info['detected_at'], ok=False)
+            return False
             
         except Exception as e:
             logger.error(f"Erro ao executar aposta: {e}")
-            take_screenshot(self.browser_manager.get_driver(), f"bet_error_{int(time.time())}.png")
+            take_screenshot(self.browser_manager.get_driver(), "bet_error.png")
             return False
     
+    @tracer.traced('executor.fill_bet_amount')
     def _fill_bet_amount(self, amount: float) -> bool:
         """Preenche o valor da aposta"""
         try:
@@ -301,16 +397,14 @@ class BetExecutor:
                 '.amount-input'
             ]
             
-            amount_field = None
-            for selector in amount_selectors:
-                try:
-                    amount_field = waiter.wait_for_element(By.CSS_SELECTOR, selector, 5)
-                    logger.info(f"Campo de valor encontrado: {selector}")
-                    break
-                except TimeoutException:
-                    continue
-            
-            if not amount_field:
+            selector, amount_field = waiter.wait_for_any(
+                self.selector_cache.ordered(self.bet_site_domain, 'amount', amount_selectors),
+                Config.ELEMENT_PROBE_TIMEOUT_SECONDS
+            )
+            if amount_field:
+                logger.info(f"Campo de valor encontrado: {selector}")
+                self.selector_cache.record(self.bet_site_domain, 'amount', selector)
+            else:
                 logger.error("Campo de valor da aposta não encontrado")
                 take_screenshot(driver, "amount_field_not_found.png")
                 return False
@@ -331,8 +425,9 @@ class BetExecutor:
             logger.error(f"Erro ao preencher valor da aposta: {e}")
             return False
     
-    def _confirm_bet(self) -> bool:
-        """Confirma a aposta"""
+    @tracer.traced('executor.confirm_bet')
+    def _confirm_bet(self, ledger_key: Optional[str] = None) -> bool:
+        """Confirma a aposta (registrada como enviada no livro-razão antes do clique)"""
         try:
             driver = self.browser_manager.get_driver()
             waiter = ElementWaiter(driver)
@@ -353,26 +448,29 @@ class BetExecutor:
                 'input[type="submit"][value*="Apostar"]'
             ]
             
-            confirm_button = None
-            for selector in confirm_selectors:
-                try:
-                    confirm_button = waiter.wait_for_clickable(By.CSS_SELECTOR, selector, 5)
-                    logger.info(f"Botão de confirmar encontrado: {selector}")
-                    break
-                except TimeoutException:
-                    continue
-            
-            if not confirm_button:
+            selector, confirm_button = waiter.wait_for_any(
+                self.selector_cache.ordered(self.bet_site_domain, 'confirm', confirm_selectors),
+                Config.ELEMENT_PROBE_TIMEOUT_SECONDS,
+                clickable=True
+            )
+            if confirm_button:
+                logger.info(f"Botão de confirmar encontrado: {selector}")
+                self.selector_cache.record(self.bet_site_domain, 'confirm', selector)
+            else:
                 logger.error("Botão de confirmar aposta não encontrado")
                 take_screenshot(driver, "confirm_button_not_found.png")
                 return False
             
-            # Clicar no botão de confirmar
+            # Clicar no botão de confirmar; a partir daqui a aposta pode ter sido aceita.
+            # O envio vai para o disco antes do clique: uma queda logo após ele não permite reapostar
+            if ledger_key and self.ledger:
+                self.ledger.mark(ledger_key, SUBMITTED, durable=True)
             confirm_button.click()
             human_like_delay(1.0, 2.0)
             
             # Aguardar confirmação
             self.browser_manager.wait_for_page_load()
+            self.browser_manager.record_step('confirm_clicked', selector=selector)
             
             # Verificar se aposta foi confirmada
             success_indicators = [
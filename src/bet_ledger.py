@@ -0,0 +1,231 @@
+
+import time
+import queue
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+from loguru import logger
+
+from config import Config
+
+# Estados de uma aposta no livro-razão
+PENDING = 'pending'
+SUBMITTED = 'submitted'
+CONFIRMED = 'confirmed'
+FAILED = 'failed'
+
+# Estados que bloqueiam nova execução do mesmo sinal: a aposta foi (ou pode ter sido) feita
+BLOCKING_STATES = (SUBMITTED, CONFIRMED)
+
+def idempotency_key(bet_info: Dict) -> str:
+    """Chave determinística do sinal: id da mensagem + link + valor"""
+    message_data = bet_info.get('message_data') or {}
+    stake = bet_info.get('valor_numerico')
+    key = f"{message_data.get('id', '')}|{bet_info.get('link', '')}|{'' if stake is None else f'{float(stake):.2f}'}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+
+class BetLedger:
+    """
+    Livro-razão das apostas em SQLite (modo WAL), consultado antes de cada
+    execução para que um retry ou reinício não aposte duas vezes no mesmo sinal.
+    O estado de cada chave fica em memória (consulta em microssegundos); as
+    gravações vão para uma fila e são confirmadas em lote por uma thread própria,
+    sem esperar disco no caminho da aposta. A exceção é a transição para
+    submitted, gravada e sincronizada antes do clique em confirmar (durable).
+    """
+    
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS bets (
+        idempotency_key TEXT PRIMARY KEY,
+        message_id TEXT,
+        source TEXT,
+        link TEXT NOT NULL,
+        stake REAL,
+        state TEXT NOT NULL,
+        attempts INTEGER NOT NULL,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS bets_state_updated_at ON bets (state, updated_at);
+    """
+    
+    UPSERT = """
+    INSERT INTO bets VALUES (:key, :message_id, :source, :link, :stake, :state, :attempts, :created_at, :updated_at)
+    ON CONFLICT (idempotency_key) DO UPDATE SET
+        state = excluded.state, attempts = excluded.attempts, updated_at = excluded.updated_at
+    """
+    
+    def __init__(self, db_file: str, flush_interval: float = None):
+        self.db_file = Path(db_file)
+        self.flush_interval = Config.LEDGER_FLUSH_INTERVAL_SECONDS if flush_interval is None else flush_interval
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        self._inflight = set()
+        self._writes = queue.Queue()
+        self._stop_event = threading.Event()
+        self._load()
+        
+        self._writer = threading.Thread(target=self._writer_loop, name="bet-ledger-writer", daemon=True)
+        self._writer.start()
+    
+    def _load(self):
+        """Carrega o estado de todas as apostas registradas"""
+        self._conn.row_factory = sqlite3.Row
+        for row in self._conn.execute("SELECT * FROM bets"):
+            entry = dict(row)
+            entry['key'] = entry.pop('idempotency_key')
+            self._entries[entry['key']] = entry
+        self._conn.row_factory = None
+        
+        unresolved = sum(1 for entry in self._entries.values() if entry['state'] == SUBMITTED)
+        logger.info(f"Livro-razão de apostas carregado: {len(self._entries)} registros")
+        if unresolved:
+            logger.warning(f"{unresolved} aposta(s) enviadas sem confirmação registrada - conferir no site")
+    
+    def state(self, key: str) -> Optional[str]:
+        """Estado registrado da chave (None se o sinal nunca foi executado)"""
+        entry = self._entries.get(key)
+        return entry['state'] if entry else None
+    
+    def claim(self, bet_info: Dict) -> Optional[str]:
+        """
+        Reserva o sinal para execução (estado pending) e retorna a chave de
+        idempotência. Retorna None se a aposta já foi enviada/confirmada ou está
+        em execução; sinais que falharam antes do envio podem ser repetidos.
+        """
+        key = idempotency_key(bet_info)
+        with self._lock:
+            entry = self._entries.get(key)
+            if key in self._inflight or (entry and entry['state'] in BLOCKING_STATES):
+                state = 'em execução' if key in self._inflight else entry['state']
+                logger.warning(f"Aposta duplicada ignorada ({state}): {bet_info.get('link')}")
+                return None
+            
+            now = time.time()
+            if entry is None:
+                message_data = bet_info.get('message_data') or {}
+                entry = {
+                    'key': key,
+                    'message_id': message_data.get('id'),
+                    'source': bet_info.get('group'),
+                    'link': bet_info.get('link', ''),
+                    'stake': bet_info.get('valor_numerico'),
+                    'attempts': 0,
+                    'created_at': now,
+                }
+                self._entries[key] = entry
+            entry.update(state=PENDING, attempts=entry['attempts'] + 1, updated_at=now)
+            self._inflight.add(key)
+            self._writes.put(key)
+        return key
+    
+    def mark(self, key: str, state: str, durable: bool = False):
+        """
+        Registra a transição de estado, gravada no próximo lote. Com durable, a
+        transição é confirmada e sincronizada no disco antes de retornar (em
+        caso de erro o estado anterior é restaurado e a exceção propagada).
+        """
+        with self._lock:
+            entry = self._entries[key]
+            previous = dict(entry)
+            entry.update(state=state, updated_at=time.time())
+            if state in (CONFIRMED, FAILED):
+                self._inflight.discard(key)
+            if not durable:
+                self._writes.put(key)
+                return
+        
+        try:
+            self._commit_durable(key)
+        except Exception:
+            with self._lock:
+                entry.update(state=previous['state'], updated_at=previous['updated_at'])
+            raise
+    
+    def _commit_durable(self, key: str):
+        """Grava a chave em uma transação com fsync (synchronous=FULL só nela)"""
+        with self._flush_lock:
+            with self._lock:
+                entry = dict(self._entries[key])
+            self._conn.execute("PRAGMA synchronous=FULL")
+            try:
+                with self._conn:
+                    self._conn.execute(self.UPSERT, entry)
+            finally:
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+    
+    def finish(self, key: str, success: bool):
+        """
+        Resultado da execução. Uma falha depois do clique em confirmar é ambígua
+        (a aposta pode ter sido aceita): o estado submitted é mantido, bloqueando
+        novas tentativas do mesmo sinal.
+        """
+        if success:
+            self.mark(key, CONFIRMED)
+            return
+        
+        with self._lock:
+            ambiguous = self._entries[key]['state'] == SUBMITTED
+            if ambiguous:
+                self._inflight.discard(key)
+        
+        if ambiguous:
+            logger.warning(f"Resultado incerto após envio, aposta mantida como {SUBMITTED}: {self._entries[key]['link']}")
+        else:
+            self.mark(key, FAILED)
+    
+    def _writer_loop(self):
+        """Confirma as gravações pendentes em lote a cada flush_interval"""
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+        self.flush()
+    
+    def flush(self) -> int:
+        """Grava em uma transação as transições pendentes (o estado atual de cada chave)"""
+        with self._flush_lock:
+            keys = set()
+            while True:
+                try:
+                    keys.add(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            
+            if not keys:
+                return 0
+            
+            # Estado atual, nunca um instantâneo antigo: um lote atrasado não desfaz uma gravação durable
+            with self._lock:
+                batch = {key: dict(self._entries[key]) for key in keys}
+            
+            try:
+                with self._conn:
+                    self._conn.executemany(self.UPSERT, list(batch.values()))
+            except Exception as e:
+                logger.error(f"Erro ao gravar livro-razão de apostas: {e}")
+                for key in keys:
+                    self._writes.put(key)
+                return 0
+            return len(batch)
+    
+    def counts(self) -> Dict[str, int]:
+        """Apostas por estado"""
+        with self._lock:
+            counts = {}
+            for entry in self._entries.values():
+                counts[entry['state']] = counts.get(entry['state'], 0) + 1
+            return counts
+    
+    def close(self):
+        """Grava o lote pendente e fecha o banco"""
+        self._stop_event.set()
+        self._writer.join(timeout=10)
+        self._conn.close()
+        logger.info(f"Livro-razão de apostas fechado - {self.counts()}")
@@ -0,0 +1,141 @@
+
+import time
+import queue
+import threading
+from typing import Callable, Dict, Optional
+from loguru import logger
+
+from clock import clock
+from tracing import tracer
+
+class BetPipeline:
+    """Fila limitada entre a detecção de sinais e a execução das apostas"""
+    
+    def __init__(self, handler: Callable[[Dict], None], max_size: int = 20, workers: int = 1):
+        self.handler = handler
+        self.max_size = max_size
+        self.worker_count = workers
+        self.queue = queue.Queue(maxsize=max_size)
+        self.running = False
+        self._workers = []
+        self._lock = threading.Lock()
+        
+        # Métricas de backpressure
+        self._submitted = 0
+        self._processed = 0
+        self._rejected = 0
+        self._failed = 0
+        self._busy_workers = 0
+        self._max_depth = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._last_wait = 0.0
+    
+    def start(self):
+        """Inicia as threads de execução"""
+        if self.running:
+            return
+        
+        self.running = True
+        for i in range(self.worker_count):
+            worker = threading.Thread(target=self._worker_loop, name=f"bet-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        
+        logger.info(f"Pipeline de apostas iniciado - {self.worker_count} worker(s), fila máxima {self.max_size}")
+    
+    def submit(self, bet_info: Dict) -> bool:
+        """Enfileira sinal sem bloquear a detecção. Retorna False se a fila estiver cheia"""
+        try:
+            self.queue.put_nowait((clock.monotonic(), bet_info))
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            logger.error(f"Fila de apostas cheia ({self.max_size}), sinal descartado: {bet_info.get('link')}")
+            return False
+        
+        depth = self.queue.qsize()
+        with self._lock:
+            self._submitted += 1
+            self._max_depth = max(self._max_depth, depth)
+        
+        if depth > 1:
+            logger.warning(f"Execução atrasada - {depth} apostas na fila")
+        return True
+    
+    def _worker_loop(self):
+        """Consome a fila e executa o handler para cada sinal"""
+        while self.running:
+            try:
+                enqueued_at, bet_info = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            
+            wait_time = clock.monotonic() - enqueued_at
+            with self._lock:
+                self._busy_workers += 1
+                self._total_wait += wait_time
+                self._max_wait = max(self._max_wait, wait_time)
+                self._last_wait = wait_time
+            
+            logger.debug(f"Sinal retirado da fila após {wait_time:.3f}s de espera")
+            tracer.record('pipeline.queue_wait', wait_time, trace_id=bet_info.get('trace_id'))
+            
+            try:
+                with tracer.trace(bet_info.get('trace_id')):
+                    self.handler(bet_info)
+            except Exception as e:
+                with self._lock:
+                    self._failed += 1
+                logger.error(f"Erro no worker de apostas: {e}")
+            finally:
+                with self._lock:
+                    self._busy_workers -= 1
+                    self._processed += 1
+                self.queue.task_done()
+    
+    def get_metrics(self) -> Dict:
+        """Retorna profundidade da fila e tempos de espera"""
+        with self._lock:
+            started = self._processed + self._busy_workers
+            return {
+                'queue_depth': self.queue.qsize(),
+                'max_queue_depth': self._max_depth,
+                'busy_workers': self._busy_workers,
+                'workers': self.worker_count,
+                'submitted': self._submitted,
+                'processed': self._processed,
+                'rejected': self._rejected,
+                'failed': self._failed,
+                'avg_wait_seconds': self._total_wait / started if started else 0.0,
+                'max_wait_seconds': self._max_wait,
+                'last_wait_seconds': self._last_wait,
+            }
+    
+    def wait_until_idle(self, timeout: Optional[float] = None) -> bool:
+        """Aguarda a fila esvaziar e os workers terminarem"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            with self._lock:
+                idle = self.queue.unfinished_tasks == 0
+            if idle:
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+    
+    def stop(self, timeout: float = 30.0):
+        """Para os workers, aguardando a aposta em andamento terminar"""
+        if not self.running:
+            return
+        
+        pending = self.queue.qsize()
+        if pending:
+            logger.warning(f"Parando pipeline com {pending} aposta(s) na fila não executadas")
+        
+        self.running = False
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+        
+        logger.info(f"Pipeline de apostas parado - métricas: {self.get_metrics()}")
@@ -6,10 +6,15 @@ from selenium.webdriver.common.by import By
 from selenium.common.exceptions import WebDriverException
 from fake_useragent import UserAgent
 from pathlib import Path
+from typing import Optional
 import time
 import random
 from loguru import logger
 from config import Config
+from utils import ElementWaiter
+from flight_recorder import FlightRecorder
+from retry_policy import NAVIGATION_POLICY, NO_DEADLINE, Deadline, DeadlineExceeded
+from tracing import tracer
 
 class BrowserManager:
     """Gerenciador de instâncias do navegador com configurações otimizadas"""
@@ -20,6 +25,7 @@ class BrowserManager:
         self.profile_dir.mkdir(parents=True, exist_ok=True)
         self.driver = None
         self.ua = UserAgent()
+        self.flight_recorder = FlightRecorder(profile_name)
     
     def create_driver(self, headless: bool = None, stealth: bool = None) -> uc.Chrome:
         """Cria instância do Chrome com configurações otimizadas"""
@@ -126,45 +132,66 @@ class BrowserManager:
             finally:
                 self.driver = None
     
-    def navigate_with_retry(self, url: str, max_retries: int = 3) -> bool:
-        """Navega para URL com retry em caso de falha"""
-        for attempt in range(max_retries):
-            try:
-                driver = self.get_driver()
-                driver.get(url)
-                
-                # Aguardar carregamento
-                time.sleep(random.uniform(2, 4))
-                
-                # Verificar se página carregou
-                if driver.current_url and "about:blank" not in driver.current_url:
-                    logger.info(f"Navegação bem-sucedida para: {url}")
-                    return True
-                else:
-                    raise WebDriverException("Página não carregou corretamente")
-                    
-            except Exception as e:
-                logger.warning(f"Tentativa {attempt + 1}/{max_retries} falhou para {url}: {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(random.uniform(3, 6))
-                    continue
-                else:
-                    logger.error(f"Falha ao navegar para {url} após {max_retries} tentativas")
-                    return False
-        return False
+    def is_responsive(self) -> bool:
+        """Verifica se o navegador ainda responde a comandos (sem driver, nada a verificar)"""
+        if self.driver is None:
+            return True
+        try:
+            self.driver.execute_script("return 1;")
+            return True
+        except Exception as e:
+            logger.warning(f"Navegador não responde: {e}")
+            return False
+    
+    def record_step(self, step: str, dom: bool = True, **detail):
+        """Registra a etapa e o estado da página no flight recorder (dom=False: só URL e título)"""
+        self.flight_recorder.record(self.driver, step, dom=dom, **detail)
+    
+    def dump_flight_recorder(self, reason: str) -> Optional[str]:
+        """Registra o estado final da página e grava o flight recorder em disco"""
+        self.record_step(reason)
+        return self.flight_recorder.dump(reason)
+    
+    @tracer.traced('browser.navigate_with_retry')
+    def navigate_with_retry(self, url: str, max_retries: int = None, deadline: Deadline = NO_DEADLINE) -> bool:
+        """
+        Navega para URL com retry (backoff exponencial por classe de erro, ver
+        NAVIGATION_POLICY). Com o prazo do sinal, DeadlineExceeded é propagado
+        quando não há tempo para outra tentativa.
+        """
+        try:
+            NAVIGATION_POLICY.run(self._navigate_once, url, deadline=deadline, max_attempts=max_retries,
+                                  on_error=lambda attempt, e: self.record_step(
+                                      'navigate_failed', url=url, attempt=attempt, error=str(e)[:200]))
+            logger.info(f"Navegação bem-sucedida para: {url}")
+            return True
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"Falha ao navegar para {url}: {e}")
+            return False
+    
+    def _navigate_once(self, url: str):
+        """Uma tentativa de navegação"""
+        driver = self.get_driver()
+        driver.get(url)
+        
+        # Aguardar carregamento
+        time.sleep(random.uniform(2, 4))
+        
+        # Verificar se página carregou
+        if not driver.current_url or "about:blank" in driver.current_url:
+            raise WebDriverException("Página não carregou corretamente")
     
+    @tracer.traced('browser.wait_for_page_load')
     def wait_for_page_load(self, timeout: int = 30) -> bool:
         """Aguarda carregamento completo da página"""
         try:
             driver = self.get_driver()
             
-            # Aguardar JavaScript terminar
-            for _ in range(timeout):
-                ready_state = driver.execute_script("return document.readyState")
-                if ready_state == "complete":
-                    time.sleep(1)  # Aguardar um pouco mais
-                    return True
-                time.sleep(1)
+            # Aguardar JavaScript terminar (retorna assim que o evento ocorrer)
+            if ElementWaiter(driver, timeout).wait_for_ready_state():
+                return True
             
             logger.warning(f"Timeout aguardando carregamento da página após {timeout}s")
             return False
@@ -173,6 +200,7 @@ class BrowserManager:
             logger.error(f"Erro ao aguardar carregamento da página: {e}")
             return False
     
+    @tracer.traced('browser.handle_cloudflare')
     def handle_cloudflare(self) -> bool:
         """Tenta lidar com proteção Cloudflare"""
         try:
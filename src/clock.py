@@ -0,0 +1,120 @@
+
+import heapq
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+class VirtualClock:
+    """
+    Relógio simulado para replay. Apenas a thread que criou o relógio (a que
+    conduz o replay) avança o tempo; as demais threads (workers do pipeline)
+    dormem até o seu horário virtual de despertar. Antes de cada avanço o
+    relógio aguarda o sistema ficar ocioso (is_idle), para que cada evento seja
+    processado no instante virtual correto.
+    """
+    
+    def __init__(self, start: float, speed: Optional[float] = None,
+                 is_idle: Optional[Callable[[int], bool]] = None):
+        self._now = start
+        self.speed = speed
+        self.is_idle = is_idle or (lambda sleeping: True)
+        self._driver = threading.get_ident()
+        self._wakeups = []
+        self._cond = threading.Condition()
+    
+    def time(self) -> float:
+        """Horário virtual atual"""
+        return self._now
+    
+    def sleep(self, seconds: float):
+        """Avança o tempo (thread condutora) ou dorme até o horário virtual (demais threads)"""
+        if threading.get_ident() == self._driver:
+            self.advance(seconds)
+        else:
+            self._sleep_until(self._now + max(0.0, seconds))
+    
+    def _sleep_until(self, wake_at: float):
+        """Bloqueia uma thread secundária até o relógio alcançar wake_at"""
+        with self._cond:
+            if wake_at <= self._now:
+                return
+            heapq.heappush(self._wakeups, wake_at)
+            self._cond.notify_all()
+            while self._now < wake_at:
+                self._cond.wait()
+    
+    def _wait_idle(self):
+        """Aguarda as threads secundárias terminarem o trabalho do instante atual"""
+        while not self.is_idle(len(self._wakeups)):
+            self._cond.wait(0.001)
+    
+    def _move_to(self, target: float):
+        """Avança até target, acordando as threads secundárias em ordem"""
+        while True:
+            self._wait_idle()
+            if not self._wakeups or self._wakeups[0] > target:
+                break
+            self._now = max(self._now, self._wakeups[0])
+            while self._wakeups and self._wakeups[0] <= self._now:
+                heapq.heappop(self._wakeups)
+            self._cond.notify_all()
+        
+        self._now = max(self._now, target)
+        self._cond.notify_all()
+    
+    def advance(self, seconds: float):
+        """Avança o tempo virtual; com speed definido, espera seconds / speed de tempo real"""
+        seconds = max(0.0, seconds)
+        with self._cond:
+            self._move_to(self._now + seconds)
+        
+        if self.speed:
+            time.sleep(seconds / self.speed)
+    
+    def drain(self):
+        """Processa todos os despertares pendentes até o sistema ficar ocioso"""
+        with self._cond:
+            while True:
+                self._wait_idle()
+                if not self._wakeups:
+                    return
+                self._move_to(self._wakeups[0])
+
+class Clock:
+    """Relógio usado pelo sistema; em replay delega a um VirtualClock"""
+    
+    def __init__(self):
+        self._virtual: Optional[VirtualClock] = None
+    
+    def time(self) -> float:
+        """Equivalente a time.time()"""
+        if self._virtual:
+            return self._virtual.time()
+        return time.time()
+    
+    def monotonic(self) -> float:
+        """Equivalente a time.monotonic()"""
+        if self._virtual:
+            return self._virtual.time()
+        return time.monotonic()
+    
+    def sleep(self, seconds: float):
+        """Equivalente a time.sleep()"""
+        if self._virtual:
+            self._virtual.sleep(seconds)
+        else:
+            time.sleep(seconds)
+    
+    @contextmanager
+    def use(self, virtual_clock: VirtualClock):
+        """Substitui o tempo real pelo relógio virtual durante o bloco"""
+        previous = self._virtual
+        self._virtual = virtual_clock
+        try:
+            yield virtual_clock
+        finally:
+            self._virtual = previous
+
+# Instância global compartilhada por todos os componentes
+clock = Clock()
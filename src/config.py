@@ -10,13 +10,35 @@ class Config:
     # Configurações do Telegram
     TELEGRAM_PHONE = os.getenv('TELEGRAM_PHONE')
     TELEGRAM_PASSWORD = os.getenv('TELEGRAM_PASSWORD')
-    TELEGRAM_GROUP_URL = os.getenv('TELEGRAM_GROUP_URL')
+    # Grupos monitorados (separados por vírgula); TELEGRAM_GROUP_URL é o primeiro
+    TELEGRAM_GROUP_URLS = [url.strip() for url in os.getenv('TELEGRAM_GROUP_URLS', os.getenv('TELEGRAM_GROUP_URL', '')).split(',') if url.strip()]
+    TELEGRAM_GROUP_URL = TELEGRAM_GROUP_URLS[0] if TELEGRAM_GROUP_URLS else None
     TELEGRAM_SESSION_FILE = os.getenv('TELEGRAM_SESSION_FILE', 'telegram_session.json')
+    SEEN_MESSAGES_FILE = os.getenv('SEEN_MESSAGES_FILE', 'seen_messages.log')
+    SEEN_MESSAGES_MAX_ENTRIES = int(os.getenv('SEEN_MESSAGES_MAX_ENTRIES', '10000'))
+    WATCHER_CURSOR_FILE = os.getenv('WATCHER_CURSOR_FILE', 'watcher_cursor.json')
+    BACKFILL_MAX_AGE_MINUTES = float(os.getenv('BACKFILL_MAX_AGE_MINUTES', '15'))
+    BACKFILL_MAX_SCROLLS = int(os.getenv('BACKFILL_MAX_SCROLLS', '50'))
+    BACKFILL_SCROLL_DELAY_SECONDS = float(os.getenv('BACKFILL_SCROLL_DELAY_SECONDS', '1'))
+    SIGNAL_ARCHIVE_FILE = os.getenv('SIGNAL_ARCHIVE_FILE', 'signal_archive.db')
+    SIGNAL_JOURNAL_FILE = os.getenv('SIGNAL_JOURNAL_FILE', 'signal_journal.jsonl')
+    JOURNAL_FSYNC_INTERVAL_SECONDS = float(os.getenv('JOURNAL_FSYNC_INTERVAL_SECONDS', '0.05'))
+    JOURNAL_COMPACT_RECORDS = int(os.getenv('JOURNAL_COMPACT_RECORDS', '1000'))
+    JOURNAL_MAX_AGE_MINUTES = float(os.getenv('JOURNAL_MAX_AGE_MINUTES', '10'))
+    
+    # Origem das mensagens: 'browser' (Telegram Web) ou 'http' (long-poll getUpdates)
+    MESSAGE_SOURCE = os.getenv('MESSAGE_SOURCE', 'browser').lower()
+    MESSAGE_SOURCE_URL = os.getenv('MESSAGE_SOURCE_URL')
+    MESSAGE_SOURCE_CHAT = os.getenv('MESSAGE_SOURCE_CHAT')
     
     # Configurações do Site de Apostas
     BET_SITE_USERNAME = os.getenv('BET_SITE_USERNAME')
     BET_SITE_PASSWORD = os.getenv('BET_SITE_PASSWORD')
     BET_SITE_BASE_URL = os.getenv('BET_SITE_BASE_URL')
+    BET_SESSION_FILE = os.getenv('BET_SESSION_FILE', 'betting_session.json')
+    SELECTOR_CACHE_FILE = os.getenv('SELECTOR_CACHE_FILE', 'selector_cache.json')
+    BET_LEDGER_FILE = os.getenv('BET_LEDGER_FILE', 'bet_ledger.db')
+    LEDGER_FLUSH_INTERVAL_SECONDS = float(os.getenv('LEDGER_FLUSH_INTERVAL_SECONDS', '0.2'))
     
     # Configurações Gerais
     CHROME_PROFILE_DIR = Path(os.getenv('CHROME_PROFILE_DIR', './chrome_profiles/betting_profile'))
@@ -24,19 +46,57 @@ class Config:
     MAX_BET_AMOUNT = float(os.getenv('MAX_BET_AMOUNT', '100.00'))
     MIN_BET_AMOUNT = float(os.getenv('MIN_BET_AMOUNT', '5.00'))
     CHECK_INTERVAL_SECONDS = int(os.getenv('CHECK_INTERVAL_SECONDS', '30'))
+    ENABLE_PUSH_MODE = os.getenv('ENABLE_PUSH_MODE', 'true').lower() == 'true'
+    PUSH_WAIT_TIMEOUT_SECONDS = int(os.getenv('PUSH_WAIT_TIMEOUT_SECONDS', '25'))
+    POLL_MIN_INTERVAL_SECONDS = float(os.getenv('POLL_MIN_INTERVAL_SECONDS', '5'))
+    POLL_MAX_INTERVAL_SECONDS = float(os.getenv('POLL_MAX_INTERVAL_SECONDS', '120'))
+    POLL_RATE_WINDOW_SECONDS = float(os.getenv('POLL_RATE_WINDOW_SECONDS', '600'))
+    POLL_TARGET_MESSAGES = float(os.getenv('POLL_TARGET_MESSAGES', '0.5'))
+    KICKOFF_WINDOWS = os.getenv('KICKOFF_WINDOWS', '')
+    DOM_CHECK_INTERVAL_SECONDS = float(os.getenv('DOM_CHECK_INTERVAL_SECONDS', '300'))
+    DOM_MAX_NODES = int(os.getenv('DOM_MAX_NODES', '30000'))
+    CHAT_RELOAD_HOURS = float(os.getenv('CHAT_RELOAD_HOURS', '12'))
+    BET_QUEUE_MAX_SIZE = int(os.getenv('BET_QUEUE_MAX_SIZE', '20'))
+    EXECUTOR_POOL_SIZE = int(os.getenv('EXECUTOR_POOL_SIZE', '1'))
+    SESSION_KEEPALIVE_MINUTES = float(os.getenv('SESSION_KEEPALIVE_MINUTES', '10'))
+    SESSION_IDLE_TIMEOUT_MINUTES = float(os.getenv('SESSION_IDLE_TIMEOUT_MINUTES', '30'))
     ENABLE_NOTIFICATIONS = os.getenv('ENABLE_NOTIFICATIONS', 'true').lower() == 'true'
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    ENABLE_TRACING = os.getenv('ENABLE_TRACING', 'true').lower() == 'true'
+    TRACE_FILE = os.getenv('TRACE_FILE', 'logs/traces.jsonl')
+    TRACE_FLUSH_INTERVAL_SECONDS = float(os.getenv('TRACE_FLUSH_INTERVAL_SECONDS', '5'))
+    TRACE_MAX_MB = float(os.getenv('TRACE_MAX_MB', '20'))
+    TRACE_MAX_FILES = int(os.getenv('TRACE_MAX_FILES', '3'))
     
     # Configurações de Segurança
     ENABLE_HEADLESS = os.getenv('ENABLE_HEADLESS', 'true').lower() == 'true'
     ENABLE_STEALTH_MODE = os.getenv('ENABLE_STEALTH_MODE', 'true').lower() == 'true'
     MAX_RETRIES = int(os.getenv('MAX_RETRIES', '3'))
     RETRY_DELAY_SECONDS = int(os.getenv('RETRY_DELAY_SECONDS', '5'))
+    RETRY_BASE_DELAY_SECONDS = float(os.getenv('RETRY_BASE_DELAY_SECONDS', '1'))
+    RETRY_MAX_DELAY_SECONDS = float(os.getenv('RETRY_MAX_DELAY_SECONDS', '8'))
+    SIGNAL_DEADLINE_SECONDS = float(os.getenv('SIGNAL_DEADLINE_SECONDS', '120'))
+    ELEMENT_PROBE_TIMEOUT_SECONDS = int(os.getenv('ELEMENT_PROBE_TIMEOUT_SECONDS', '15'))
+    MAX_MESSAGE_LENGTH = int(os.getenv('MAX_MESSAGE_LENGTH', '4096'))
+    WAIT_POLL_INTERVAL_SECONDS = float(os.getenv('WAIT_POLL_INTERVAL_SECONDS', '0.05'))
+    
+    # Screenshots (gravação em segundo plano com retenção)
+    SCREENSHOT_DIR = os.getenv('SCREENSHOT_DIR', 'screenshots')
+    SCREENSHOT_FORMAT = os.getenv('SCREENSHOT_FORMAT', 'jpeg').lower()
+    SCREENSHOT_QUALITY = int(os.getenv('SCREENSHOT_QUALITY', '70'))
+    SCREENSHOT_MAX_FILES = int(os.getenv('SCREENSHOT_MAX_FILES', '500'))
+    SCREENSHOT_MAX_MB = float(os.getenv('SCREENSHOT_MAX_MB', '200'))
+    
+    # Flight recorder (estado das páginas por etapa, gravado só em falhas ou via SIGUSR1)
+    FLIGHT_RECORDER_SIZE = int(os.getenv('FLIGHT_RECORDER_SIZE', '50'))
+    FLIGHT_RECORDER_DOM_CHARS = int(os.getenv('FLIGHT_RECORDER_DOM_CHARS', '20000'))
+    FLIGHT_RECORDER_DIR = os.getenv('FLIGHT_RECORDER_DIR', 'logs/flight_recorder')
+    FLIGHT_RECORDER_PRE_CLICK_DOM = os.getenv('FLIGHT_RECORDER_PRE_CLICK_DOM', 'false').lower() == 'true'
     
     # Criar diretórios necessários
     CHROME_PROFILE_DIR.mkdir(parents=True, exist_ok=True)
     Path('logs').mkdir(exist_ok=True)
-    Path('screenshots').mkdir(exist_ok=True)
+    Path(SCREENSHOT_DIR).mkdir(exist_ok=True)
 
 # Validação de configurações obrigatórias
 def validate_config():
@@ -45,6 +105,10 @@ def validate_config():
         'BET_SITE_USERNAME', 'BET_SITE_PASSWORD', 'BET_SITE_BASE_URL'
     ]
     
+    # Backend HTTP não faz login no Telegram Web
+    if Config.MESSAGE_SOURCE == 'http':
+        required_vars[:2] = ['MESSAGE_SOURCE_URL']
+    
     missing_vars = []
     for var in required_vars:
         if not getattr(Config, var):
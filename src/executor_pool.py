@@ -0,0 +1,251 @@
+
+import queue
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+from loguru import logger
+
+from bet_executor import BetExecutor
+from bet_ledger import BetLedger
+from config import Config
+
+# Arquivos que não devem ser copiados ao clonar um perfil do Chrome
+PROFILE_CLONE_IGNORE = shutil.ignore_patterns(
+    'Singleton*', '*.lock', 'LOCK', 'lockfile', 'Cache', 'Code Cache', 'GPUCache'
+)
+
+class BetExecutorPool:
+    """Pool de BetExecutors, cada um com seu próprio navegador e perfil"""
+    
+    def __init__(self, size: int = 1, base_profile: str = "betting_profile", ledger: Optional[BetLedger] = None):
+        self.size = max(1, size)
+        self.base_profile = base_profile
+        self.ledger = ledger
+        self._idle = queue.Queue()
+        self._executors: Dict[int, BetExecutor] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._keep_alive_thread = None
+        self._waiting = 0
+        self._keep_alive_interval = 0.0
+        self.recycled_count = 0
+    
+    def _profile_name(self, slot: int) -> str:
+        """Nome do perfil do slot (o slot 0 usa o perfil base)"""
+        if slot == 0:
+            return self.base_profile
+        return f"{self.base_profile}_{slot}"
+    
+    def _session_file(self, slot: int) -> str:
+        """Arquivo de cookies do slot (cada navegador grava o seu; o slot 0 usa o base)"""
+        base = Path(Config.BET_SESSION_FILE)
+        if slot == 0:
+            return str(base)
+        return str(base.with_name(f"{base.stem}_{slot}{base.suffix}"))
+    
+    def _seed_session(self, slot: int):
+        """Copia os cookies do slot 0 para um slot novo (o login dele parte da mesma sessão)"""
+        base_file = Path(self._session_file(0))
+        target_file = Path(self._session_file(slot))
+        if target_file.exists() or not base_file.exists():
+            return
+        try:
+            shutil.copyfile(base_file, target_file)
+        except Exception as e:
+            logger.warning(f"Falha ao copiar sessão para o slot {slot}: {e}")
+    
+    def _clone_profile(self, profile_name: str):
+        """Clona o perfil base (cookies, login) para um novo slot"""
+        base_dir = Config.CHROME_PROFILE_DIR / self.base_profile
+        target_dir = Config.CHROME_PROFILE_DIR / profile_name
+        
+        if target_dir.exists() or not base_dir.exists():
+            return
+        
+        try:
+            shutil.copytree(base_dir, target_dir, ignore=PROFILE_CLONE_IGNORE)
+            logger.info(f"Perfil {profile_name} clonado de {self.base_profile}")
+        except Exception as e:
+            logger.warning(f"Falha ao clonar perfil {profile_name}, usando perfil vazio: {e}")
+    
+    def _create_executor(self, slot: int) -> BetExecutor:
+        """Cria o executor de um slot"""
+        profile_name = self._profile_name(slot)
+        if slot > 0:
+            self._clone_profile(profile_name)
+            self._seed_session(slot)
+        
+        executor = BetExecutor(profile_name, self._session_file(slot))
+        executor.pool_slot = slot
+        executor.ledger = self.ledger
+        with self._lock:
+            self._executors[slot] = executor
+        return executor
+    
+    def _warm_up(self, executor: BetExecutor):
+        """Abre o navegador e faz login antes do primeiro sinal"""
+        try:
+            if not executor.login():
+                logger.warning(f"Login do executor {executor.pool_slot} falhou, será refeito na próxima aposta")
+        except Exception as e:
+            logger.error(f"Erro ao preparar executor {executor.pool_slot}: {e}")
+    
+    def start(self):
+        """Cria todos os executores e faz login em paralelo"""
+        executors = [self._create_executor(slot) for slot in range(self.size)]
+        
+        threads = [
+            threading.Thread(target=self._warm_up, args=(executor,), name=f"executor-warmup-{executor.pool_slot}")
+            for executor in executors
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        for executor in executors:
+            self._idle.put(executor)
+        
+        logger.info(f"Pool de executores pronto com {self.size} navegador(es)")
+    
+    def acquire(self, timeout: Optional[float] = None) -> BetExecutor:
+        """Retorna o primeiro executor ocioso (bloqueia até haver um)"""
+        with self._lock:
+            self._waiting += 1
+        try:
+            return self._idle.get(timeout=timeout)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+    
+    def release(self, executor: BetExecutor, healthy: bool = True):
+        """Devolve o executor ao pool, reciclando-o se o navegador falhou"""
+        if not healthy:
+            executor = self._recycle(executor)
+        self._idle.put(executor)
+    
+    def _recycle(self, executor: BetExecutor) -> BetExecutor:
+        """Fecha o navegador com falha e cria um novo no mesmo slot"""
+        slot = executor.pool_slot
+        logger.warning(f"Reciclando executor {slot} após falha")
+        
+        try:
+            executor.close()
+        except Exception as e:
+            logger.error(f"Erro ao fechar executor {slot}: {e}")
+        
+        new_executor = self._create_executor(slot)
+        self._warm_up(new_executor)
+        with self._lock:
+            self.recycled_count += 1
+        return new_executor
+    
+    def execute_bet(self, bet_info: Dict) -> bool:
+        """Executa a aposta no primeiro executor ocioso"""
+        executor = self.acquire()
+        healthy = False
+        try:
+            logger.info(f"Aposta atribuída ao executor {executor.pool_slot}")
+            success = executor.execute_bet(bet_info)
+            # Só falhas do navegador reciclam o executor; falhas da aposta não
+            healthy = success or not executor.browser_failed
+            return success
+        finally:
+            self.release(executor, healthy=healthy)
+    
+    def start_keep_alive(self, interval_seconds: float):
+        """Inicia verificação periódica das sessões em segundo plano"""
+        if self._keep_alive_thread or interval_seconds <= 0:
+            return
+        
+        self._keep_alive_interval = interval_seconds
+        self._keep_alive_thread = threading.Thread(
+            target=self._keep_alive_loop, args=(interval_seconds,), name="executor-keepalive", daemon=True
+        )
+        self._keep_alive_thread.start()
+        logger.info(f"Keep-alive de sessão ativo a cada {interval_seconds:.0f}s")
+    
+    def _keep_alive_loop(self, interval_seconds: float):
+        """Loop do keep-alive"""
+        while not self._stop_event.wait(interval_seconds):
+            self._keep_alive_round()
+    
+    def _signal_waiting(self) -> bool:
+        """Algum sinal aguardando executor em acquire()"""
+        with self._lock:
+            return self._waiting > 0
+    
+    def _can_spare_executor(self) -> bool:
+        """
+        O keep-alive só ocupa um executor se nenhum sinal estiver esperando em
+        acquire() e, com mais de um navegador, se outro continuar livre.
+        """
+        if self._signal_waiting():
+            return False
+        return self.size == 1 or self.idle_count() > 1
+    
+    def _keep_alive_round(self):
+        """
+        Verifica cada executor ocioso, um por vez. Baixa prioridade: executores
+        ocupados são ignorados, a rodada é interrompida se um sinal precisar do
+        executor e cada um volta ao pool logo após a verificação. Com um único
+        navegador (nenhum outro livre para os sinais) a verificação só é feita
+        quando a sessão expiraria antes da próxima rodada, e é abandonada se
+        um sinal chegar durante ela. Sessão expirada que não pôde ser renovada
+        só recicla o executor se o navegador deixou de responder; caso
+        contrário o login é refeito na próxima aposta.
+        """
+        verified = set()
+        while not self._stop_event.is_set():
+            if not self._can_spare_executor():
+                logger.debug("Keep-alive adiado: executores reservados para sinais")
+                break
+            
+            try:
+                executor = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            
+            if executor.pool_slot in verified or (
+                    self.size == 1 and not executor.session_needs_refresh(self._keep_alive_interval)):
+                self._idle.put(executor)
+                break
+            
+            healthy = False
+            try:
+                healthy = executor.verify_session(self._signal_waiting) or not executor.browser_failed
+            finally:
+                verified.add(executor.pool_slot)
+                self.release(executor, healthy=healthy)
+        
+        logger.info(f"Keep-alive concluído - sessões: {self.get_session_info()}")
+    
+    def get_session_info(self) -> Dict[int, Dict]:
+        """Idade e última verificação da sessão de cada executor"""
+        with self._lock:
+            executors = dict(self._executors)
+        return {slot: executor.get_session_info() for slot, executor in executors.items()}
+    
+    def idle_count(self) -> int:
+        """Quantidade de executores livres"""
+        return self._idle.qsize()
+    
+    def close(self):
+        """Fecha todos os navegadores do pool"""
+        self._stop_event.set()
+        if self._keep_alive_thread:
+            self._keep_alive_thread.join(timeout=30)
+            self._keep_alive_thread = None
+        
+        with self._lock:
+            executors = list(self._executors.values())
+            self._executors = {}
+        
+        for executor in executors:
+            try:
+                executor.close()
+            except Exception as e:
+                logger.error(f"Erro ao fechar executor {executor.pool_slot}: {e}")
+        
+        logger.info("Pool de executores fechado")
@@ -0,0 +1,137 @@
+
+import json
+import time
+import threading
+import weakref
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from loguru import logger
+
+from config import Config
+from tracing import tracer
+
+# Regiões do bilhete de aposta, em ordem de preferência (fallback: body)
+BET_SLIP_SELECTORS = [
+    '.betslip',
+    '.bet-slip',
+    '[class*="betslip"]',
+    '[class*="bet-slip"]',
+    '[id*="betslip"]',
+    '.bet-amount',
+    'form'
+]
+
+# Estado da página em um round trip: URL, título e HTML da região do bilhete (truncado)
+SNAPSHOT_SCRIPT = """
+const selectors = arguments[0];
+const maxChars = arguments[1];
+let region = null;
+let regionSelector = 'body';
+for (const sel of selectors) {
+    region = document.querySelector(sel);
+    if (region) { regionSelector = sel; break; }
+}
+const root = region || document.body || document.documentElement;
+const html = root ? root.outerHTML : '';
+return {url: location.href, title: document.title, region: regionSelector,
+        dom: html.length > maxChars ? html.slice(0, maxChars) : html, truncated: html.length > maxChars};
+"""
+
+# Só URL e título (etapas antes do clique em confirmar, sem serializar o HTML)
+PAGE_INFO_SCRIPT = "return {url: location.href, title: document.title};"
+
+class FlightRecorder:
+    """
+    Gravador de voo de um navegador: guarda em memória limitada (buffer
+    circular) o estado da página a cada etapa da aposta. Só vai para o disco
+    quando uma aposta falha ou sob demanda (SIGUSR1), sem custo de disco nas
+    apostas bem-sucedidas.
+    """
+    
+    # Instâncias vivas, para o dump sob demanda de todos os navegadores
+    instances = weakref.WeakSet()
+    
+    # Dumps mantidos no diretório (os mais antigos são apagados)
+    MAX_DUMPS = 100
+    
+    def __init__(self, name: str, size: int = None, max_dom_chars: int = None, directory: str = None):
+        self.name = name
+        self.size = Config.FLIGHT_RECORDER_SIZE if size is None else size
+        self.max_dom_chars = Config.FLIGHT_RECORDER_DOM_CHARS if max_dom_chars is None else max_dom_chars
+        self.directory = Path(directory or Config.FLIGHT_RECORDER_DIR)
+        self._entries = deque(maxlen=max(1, self.size))
+        self._lock = threading.Lock()
+        FlightRecorder.instances.add(self)
+    
+    def record(self, driver, step: str, dom: bool = True, **detail):
+        """
+        Registra a etapa com o estado atual da página (nunca interrompe a aposta).
+        Com dom=False registra só URL e título, sem o HTML do bilhete.
+        """
+        if self.size <= 0:
+            return
+        
+        entry = {'ts': round(time.time(), 3), 'step': step, 'trace_id': tracer.current_trace_id()}
+        if detail:
+            entry['detail'] = detail
+        
+        if driver is not None:
+            try:
+                if dom:
+                    entry.update(driver.execute_script(SNAPSHOT_SCRIPT, BET_SLIP_SELECTORS, self.max_dom_chars) or {})
+                else:
+                    entry.update(driver.execute_script(PAGE_INFO_SCRIPT) or {})
+            except Exception as e:
+                entry['error'] = str(e)[:200]
+        
+        with self._lock:
+            self._entries.append(entry)
+    
+    def entries(self) -> List[Dict]:
+        """Etapas registradas, da mais antiga para a mais nova"""
+        with self._lock:
+            return list(self._entries)
+    
+    def clear(self):
+        """Descarta as etapas registradas"""
+        with self._lock:
+            self._entries.clear()
+    
+    def dump(self, reason: str) -> Optional[str]:
+        """Grava as etapas registradas em JSON e retorna o caminho"""
+        entries = self.entries()
+        if not entries:
+            return None
+        
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{self.name}_{datetime.now():%Y%m%d_%H%M%S_%f}_{reason}.json"
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'recorder': self.name, 'reason': reason, 'entries': entries}, f, ensure_ascii=False, indent=1)
+        except Exception as e:
+            logger.error(f"Erro ao gravar flight recorder: {e}")
+            return None
+        
+        self._prune()
+        logger.info(f"Flight recorder gravado ({len(entries)} etapas): {path}")
+        return str(path)
+    
+    def _prune(self):
+        """Mantém apenas os MAX_DUMPS dumps mais recentes"""
+        dumps = sorted(self.directory.glob('*.json'), key=lambda path: path.stat().st_mtime)
+        for path in dumps[:-self.MAX_DUMPS]:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+def dump_all(reason: str = 'on_demand') -> List[str]:
+    """Grava o flight recorder de todos os navegadores abertos"""
+    paths = []
+    for recorder in list(FlightRecorder.instances):
+        path = recorder.dump(reason)
+        if path:
+            paths.append(path)
+    return paths
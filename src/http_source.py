@@ -0,0 +1,156 @@
+
+import json
+from typing import Optional, Dict, List
+import requests
+from loguru import logger
+
+from message_source import MessageSource
+from clock import clock
+from config import Config
+
+# Tipos de atualização que carregam mensagens de grupo ou canal
+ALLOWED_UPDATES = ('message', 'channel_post')
+
+def entity_link(text: str, entities: Optional[List[Dict]]) -> str:
+    """Primeiro link da mensagem (entidades url e text_link, offsets em unidades UTF-16)"""
+    encoded = None
+    for entity in entities or []:
+        if entity.get('type') == 'text_link':
+            return entity.get('url', '')
+        if entity.get('type') == 'url':
+            encoded = encoded or text.encode('utf-16-le')
+            start = entity['offset'] * 2
+            return encoded[start:start + entity['length'] * 2].decode('utf-16-le')
+    return ''
+
+class HttpMessageSource(MessageSource):
+    """
+    Origem de mensagens por long-poll HTTP no formato getUpdates da Bot API do
+    Telegram (bot membro do grupo ou canal). Sem navegador: cada requisição fica
+    aberta até chegar uma mensagem ou o timeout expirar.
+    """
+    
+    def __init__(self, base_url: str, chats: Optional[str] = None, timeout: int = None, seen_file: str = None,
+                 cursor_file: str = None):
+        if not base_url:
+            raise ValueError("MESSAGE_SOURCE_URL não configurada")
+        
+        super().__init__(seen_file, cursor_file)
+        self.base_url = base_url.rstrip('/')
+        self.chats = {chat.strip() for chat in str(chats or '').split(',') if chat.strip()}
+        self.timeout = Config.PUSH_WAIT_TIMEOUT_SECONDS if timeout is None else timeout
+        self.update_offset = None
+        self.running = False
+        self.session = requests.Session()
+    
+    @staticmethod
+    def _chat_group(chat: Dict) -> str:
+        """Identificador do grupo de origem (@username ou id numérico)"""
+        return f"@{chat['username']}" if chat.get('username') else str(chat.get('id'))
+    
+    def _matches_chat(self, chat: Dict) -> bool:
+        """Filtra os grupos configurados (ids numéricos ou @usernames)"""
+        if not self.chats:
+            return True
+        return bool(self.chats & {str(chat.get('id')), chat.get('username'), self._chat_group(chat)})
+    
+    def fetch_updates(self, timeout: int) -> List[Dict]:
+        """
+        Uma chamada getUpdates. Sem offset (primeira chamada) pede apenas a
+        última atualização, como o watcher que começa pela última mensagem;
+        o offset seguinte confirma as anteriores no servidor.
+        """
+        params = {
+            'offset': -1 if self.update_offset is None else self.update_offset,
+            'timeout': timeout,
+            'allowed_updates': json.dumps(ALLOWED_UPDATES),
+        }
+        response = self.session.get(f"{self.base_url}/getUpdates", params=params, timeout=(10, timeout + 10))
+        payload = response.json()
+        
+        if not payload.get('ok'):
+            retry_after = payload.get('parameters', {}).get('retry_after', Config.RETRY_DELAY_SECONDS)
+            logger.warning(f"getUpdates recusado ({payload.get('description')}), aguardando {retry_after}s")
+            clock.sleep(retry_after)
+            return []
+        
+        raw_messages = []
+        for update in payload['result']:
+            self.update_offset = update['update_id'] + 1
+            post = update.get('message') or update.get('channel_post')
+            if not post or not self._matches_chat(post['chat']):
+                continue
+            
+            text = post.get('text') or post.get('caption') or ''
+            if not text.strip():
+                continue
+            
+            raw_messages.append({
+                'mid': post['message_id'],
+                'ts': float(post['date']),
+                'text': text,
+                'link': entity_link(text, post.get('entities') or post.get('caption_entities')),
+                'group': self._chat_group(post['chat']),
+            })
+        return raw_messages
+    
+    def get_new_messages(self) -> List[Dict]:
+        """Aguarda (long-poll) e retorna as mensagens mais novas que o cursor"""
+        messages = self._accept_raw_messages(self.fetch_updates(self.timeout))
+        if messages:
+            logger.debug(f"{len(messages)} mensagens novas via long-poll")
+        return messages
+    
+    def get_latest_message(self) -> Optional[Dict]:
+        """Última mensagem disponível, sem aguardar"""
+        messages = self._accept_raw_messages(self.fetch_updates(0))
+        return messages[-1] if messages else None
+    
+    def backfill(self, callback_function) -> int:
+        """
+        Após um reinício com cursor salvo, lê desde o offset 0 as atualizações
+        ainda pendentes no servidor (lotes de até 100 por chamada, sem aguardar)
+        e descarta pelo cursor de cada grupo as já processadas.
+        """
+        if not self.cursors or self.update_offset is not None:
+            return 0
+        
+        self.update_offset = 0
+        dispatched = 0
+        while True:
+            offset = self.update_offset
+            dispatched += self.process_backlog(self._accept_raw_messages(self.fetch_updates(0)), callback_function)
+            if self.update_offset == offset:
+                return dispatched
+    
+    def start_monitoring(self, callback_function):
+        """Inicia monitoramento contínuo por long-poll"""
+        logger.info(f"Monitoramento iniciado - long-poll HTTP (timeout {self.timeout}s)")
+        self.running = True
+        
+        try:
+            self.backfill(callback_function)
+        except Exception as e:
+            logger.error(f"Erro no backfill: {e}")
+        
+        while self.running:
+            try:
+                for bet_info in self.check_for_new_messages():
+                    self._dispatch(bet_info, callback_function)
+            
+            except KeyboardInterrupt:
+                logger.info("Monitoramento interrompido pelo usuário")
+                break
+            except Exception as e:
+                if not self.running:
+                    break
+                logger.error(f"Erro no long-poll: {e}")
+                clock.sleep(Config.RETRY_DELAY_SECONDS)
+        
+        return True
+    
+    def close(self):
+        """Encerra o monitoramento e a conexão"""
+        self.running = False
+        self.session.close()
+        logger.info("Origem HTTP fechada")
@@ -7,16 +7,23 @@ Monitora grupo do Telegram e executa apostas automaticamente
 
 import sys
 import signal
-import time
 from pathlib import Path
 from loguru import logger
 
 # Adicionar src ao path
 sys.path.append(str(Path(__file__).parent))
 
+from clock import clock
 from config import Config, validate_config
-from telegram_watcher import TelegramWatcher
-from bet_executor import BetExecutor
+from message_source import create_message_source
+from executor_pool import BetExecutorPool
+from bet_ledger import BetLedger
+from signal_journal import SignalJournal
+from bet_pipeline import BetPipeline
+from artifacts import artifact_writer
+from flight_recorder import dump_all
+from retry_policy import Deadline
+from tracing import tracer
 
 class BettingAutomationSystem:
     """Sistema principal de automação de apostas"""
@@ -24,6 +31,9 @@ class BettingAutomationSystem:
     def __init__(self):
         self.telegram_watcher = None
         self.bet_executor = None
+        self.bet_pipeline = None
+        self.bet_ledger = None
+        self.signal_journal = None
         self.running = False
         
         # Configurar logging
@@ -32,6 +42,10 @@ class BettingAutomationSystem:
         # Configurar handler para interrupção
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
+        
+        # kill -USR1 <pid>: grava o flight recorder dos navegadores sem parar o sistema
+        if hasattr(signal, 'SIGUSR1'):
+            signal.signal(signal.SIGUSR1, self._dump_signal_handler)
     
     def _setup_logging(self):
         """Configura sistema de logging"""
@@ -63,6 +77,11 @@ class BettingAutomationSystem:
         logger.info(f"Sinal {signum} recebido, encerrando sistema...")
         self.stop()
     
+    def _dump_signal_handler(self, signum, frame):
+        """Handler do SIGUSR1: grava o flight recorder de todos os navegadores"""
+        paths = dump_all('on_demand')
+        logger.info(f"Sinal {signum} recebido, flight recorder gravado: {paths or 'nenhuma etapa registrada'}")
+    
     def initialize(self) -> bool:
         """Inicializa componentes do sistema"""
         try:
@@ -73,8 +92,17 @@ class BettingAutomationSystem:
             logger.info("Configurações validadas")
             
             # Inicializar componentes
-            self.telegram_watcher = TelegramWatcher()
-            self.bet_executor = BetExecutor()
+            self.telegram_watcher = create_message_source()
+            self.bet_ledger = BetLedger(Config.BET_LEDGER_FILE)
+            self.signal_journal = SignalJournal(Config.SIGNAL_JOURNAL_FILE)
+            self.bet_executor = BetExecutorPool(Config.EXECUTOR_POOL_SIZE, ledger=self.bet_ledger)
+            
+            # Fila entre detecção e execução: o monitoramento continua enquanto apostas executam
+            self.bet_pipeline = BetPipeline(
+                self._execute_bet_signal,
+                max_size=Config.BET_QUEUE_MAX_SIZE,
+                workers=Config.EXECUTOR_POOL_SIZE
+            )
             
             logger.info("Componentes inicializados com sucesso")
             return True
@@ -96,6 +124,51 @@ class BettingAutomationSystem:
             logger.info(f"Odds: {bet_info.get('odds', 'N/A')}")
             logger.info(f"Link: {bet_info.get('link', 'N/A')}")
             
+            # Registrar no journal antes de enfileirar: sobrevive a uma queda até a execução
+            if self.signal_journal:
+                self.signal_journal.append(bet_info)
+            
+            self._submit_bet(bet_info)
+        
+        except Exception as e:
+            logger.error(f"Erro no callback de nova aposta: {e}")
+    
+    def _submit_bet(self, bet_info: dict):
+        """Enfileira a aposta para execução sem bloquear o monitoramento"""
+        try:
+            if self.bet_pipeline.submit(bet_info):
+                logger.info(f"Aposta enfileirada - métricas da fila: {self.bet_pipeline.get_metrics()}")
+                return
+            
+            if self.signal_journal:
+                self.signal_journal.done(bet_info)
+            if Config.ENABLE_NOTIFICATIONS:
+                self._send_notification("Aposta descartada - fila de execução cheia", bet_info)
+            
+        except Exception as e:
+            logger.error(f"Erro no callback de nova aposta: {e}")
+    
+    def _execute_bet_signal(self, bet_info: dict):
+        """Executa a aposta (chamado pelos workers do pipeline)"""
+        ledger_key = None
+        success = False
+        try:
+            # Sinal que esperou na fila além do prazo: abandonar sem ocupar um navegador
+            deadline = Deadline.for_signal(bet_info)
+            if deadline.expired():
+                logger.warning(f"Aposta abandonada - prazo do sinal vencido há {-deadline.remaining():.1f}s na fila")
+                tracer.record('signal.abandoned', clock.time() - bet_info['detected_at'], ok=False)
+                if Config.ENABLE_NOTIFICATIONS:
+                    self._send_notification("Aposta abandonada - prazo do sinal vencido", bet_info)
+                return
+            
+            # Cada sinal é apostado uma única vez, mesmo após retry ou reinício
+            if self.bet_ledger:
+                ledger_key = self.bet_ledger.claim(bet_info)
+                if ledger_key is None:
+                    return
+                bet_info['idempotency_key'] = ledger_key
+            
             # Executar aposta
             logger.info("Executando aposta...")
             success = self.bet_executor.execute_bet(bet_info)
@@ -106,6 +179,11 @@ class BettingAutomationSystem:
                 # Notificação (se habilitada)
                 if Config.ENABLE_NOTIFICATIONS:
                     self._send_notification("Aposta executada com sucesso!", bet_info)
+            elif bet_info.get('abandoned'):
+                logger.error(f"❌ APOSTA ABANDONADA: {bet_info['abandoned']}")
+                
+                if Config.ENABLE_NOTIFICATIONS:
+                    self._send_notification("Aposta abandonada - prazo do sinal vencido", bet_info)
             else:
                 logger.error("❌ FALHA NA EXECUÇÃO DA APOSTA")
                 
@@ -116,7 +194,12 @@ class BettingAutomationSystem:
             logger.info("="*60)
             
         except Exception as e:
-            logger.error(f"Erro no callback de nova aposta: {e}")
+            logger.error(f"Erro ao executar aposta: {e}")
+        finally:
+            if ledger_key:
+                self.bet_ledger.finish(ledger_key, success)
+            if self.signal_journal:
+                self.signal_journal.done(bet_info)
     
     def _send_notification(self, title: str, bet_info: dict):
         """Envia notificação (placeholder para implementação futura)"""
@@ -142,6 +225,16 @@ class BettingAutomationSystem:
             
             self.running = True
             
+            # Navegadores de aposta abertos e logados antes do primeiro sinal
+            self.bet_executor.start()
+            self.bet_executor.start_keep_alive(Config.SESSION_KEEPALIVE_MINUTES * 60)
+            self.bet_pipeline.start()
+            
+            # Sinais detectados e não executados antes da última parada
+            if self.signal_journal:
+                for bet_info in self.signal_journal.recover():
+                    self._submit_bet(bet_info)
+            
             # Iniciar monitoramento do Telegram
             logger.info("Iniciando monitoramento do Telegram...")
             self.telegram_watcher.start_monitoring(self.on_new_bet_detected)
@@ -165,9 +258,25 @@ class BettingAutomationSystem:
             if self.telegram_watcher:
                 self.telegram_watcher.close()
             
+            if self.bet_pipeline:
+                self.bet_pipeline.stop()
+            
             if self.bet_executor:
                 self.bet_executor.close()
             
+            if self.bet_ledger:
+                self.bet_ledger.close()
+            
+            if self.signal_journal:
+                self.signal_journal.close()
+            
+            # Screenshots ainda na fila de gravação
+            artifact_writer.close()
+            
+            # Resumo de latência por etapa
+            tracer.log_summary()
+            tracer.close()
+            
             logger.info("Sistema parado com sucesso")
             
         except Exception as e:
@@ -0,0 +1,219 @@
+
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Optional, Dict, List
+from loguru import logger
+
+from utils import MessageParser, SeenMessageIndex, CursorStore, build_message_id, has_stable_id
+from clock import clock
+from config import Config
+from tracing import tracer
+
+# Backends de ingestão disponíveis (Config.MESSAGE_SOURCE)
+MESSAGE_SOURCES = ('browser', 'http')
+
+class MessageSource(ABC):
+    """
+    Origem de mensagens do grupo. Cada backend (Telegram Web via Selenium,
+    long-poll HTTP, replay) implementa a leitura das mensagens; a deduplicação,
+    o cursor por id de mensagem (persistido entre reinícios) e a extração das
+    apostas ficam aqui.
+    """
+    
+    def __init__(self, seen_file: str = None, cursor_file: str = None):
+        self.last_message_id = None
+        self.last_message_text = ""
+        self.group = Config.TELEGRAM_GROUP_URL or ''
+        self.seen_messages = SeenMessageIndex(seen_file or Config.SEEN_MESSAGES_FILE, Config.SEEN_MESSAGES_MAX_ENTRIES)
+        
+        # Cursor restaurado da execução anterior: o backfill parte dele
+        self.cursor_store = CursorStore(cursor_file or Config.WATCHER_CURSOR_FILE)
+        self.cursors: Dict[str, int] = self.cursor_store.mids()
+    
+    @abstractmethod
+    def get_latest_message(self) -> Optional[Dict]:
+        """Obtém a última mensagem do grupo"""
+    
+    @abstractmethod
+    def get_new_messages(self) -> List[Dict]:
+        """Obtém todas as mensagens mais novas que o cursor"""
+    
+    @abstractmethod
+    def start_monitoring(self, callback_function):
+        """Monitora o grupo e entrega cada aposta detectada ao callback"""
+    
+    def close(self):
+        """Libera os recursos do backend"""
+    
+    @property
+    def last_message_mid(self) -> Optional[int]:
+        """Cursor (id da última mensagem) do grupo atual"""
+        return self.cursors.get(self.group)
+    
+    @last_message_mid.setter
+    def last_message_mid(self, mid: Optional[int]):
+        self.cursors[self.group] = mid
+    
+    def _build_message_data(self, message_text: str, link: str, mid: Optional[int] = None,
+                            sent_at: Optional[float] = None, group: Optional[str] = None) -> Dict:
+        """Monta o dicionário padrão de mensagem"""
+        group = self.group if group is None else group
+        
+        # ID determinístico por grupo (id do Telegram ou conteúdo + horário de envio)
+        message_id = build_message_id(group, message_text, mid, sent_at)
+        
+        # Usar horário de envio do Telegram (data-timestamp) quando disponível
+        timestamp = datetime.fromtimestamp(sent_at) if sent_at else datetime.now()
+        
+        return {
+            'id': message_id,
+            'group': group,
+            'mid': mid,
+            'sent_at': sent_at,
+            'text': message_text,
+            'link': link,
+            'timestamp': timestamp.isoformat()
+        }
+    
+    def _accept_raw_messages(self, raw_messages: List[Dict]) -> List[Dict]:
+        """Converte mensagens brutas do backend (mid, ts, text, link, group) e avança o cursor do grupo"""
+        messages = []
+        for raw in raw_messages:
+            group = raw.get('group', self.group)
+            mid = raw.get('mid')
+            if mid is not None:
+                # Ignorar mensagens já vistas (ex.: histórico carregado ao rolar)
+                cursor = self.cursors.get(group)
+                if cursor is not None and mid <= cursor:
+                    continue
+                self.cursors[group] = mid
+            messages.append(self._build_message_data(raw['text'], raw['link'], mid, raw.get('ts'), group))
+        return messages
+    
+    def check_for_new_message(self) -> Optional[Dict]:
+        """Verifica se há nova mensagem e retorna informações de aposta"""
+        try:
+            current_message = self.get_latest_message()
+            
+            if not current_message:
+                return None
+            
+            return self._process_message(current_message)
+        
+        except Exception as e:
+            logger.error(f"Erro ao verificar nova mensagem: {e}")
+            return None
+        finally:
+            self.save_cursors()
+    
+    def check_for_new_messages(self) -> List[Dict]:
+        """Verifica todas as mensagens novas desde o cursor e retorna as apostas encontradas"""
+        bet_infos = []
+        for message_data in self.get_new_messages():
+            bet_info = self._process_message(message_data)
+            if bet_info:
+                bet_infos.append(bet_info)
+        self.save_cursors()
+        return bet_infos
+    
+    def process_backlog(self, messages: List[Dict], callback_function) -> int:
+        """
+        Entrega em ordem as mensagens acumuladas enquanto o processo estava parado.
+        Sinais mais velhos que BACKFILL_MAX_AGE_MINUTES apenas avançam o cursor
+        (odds e mercados já mudaram). Retorna o número de apostas entregues.
+        """
+        cutoff = clock.time() - Config.BACKFILL_MAX_AGE_MINUTES * 60
+        dispatched = 0
+        stale = 0
+        
+        for message_data in messages:
+            if message_data.get('sent_at') and message_data['sent_at'] < cutoff:
+                self.seen_messages.add(message_data['id'])
+                self._advance_cursor(message_data)
+                stale += 1
+                continue
+            
+            bet_info = self._process_message(message_data)
+            if bet_info:
+                self._dispatch(bet_info, callback_function)
+                dispatched += 1
+        self.save_cursors()
+        
+        if messages:
+            logger.info(
+                f"Backfill: {len(messages)} mensagens perdidas, {dispatched} apostas entregues, "
+                f"{stale} ignoradas por idade (> {Config.BACKFILL_MAX_AGE_MINUTES} min)"
+            )
+        return dispatched
+    
+    def _advance_cursor(self, message_data: Dict):
+        """Avança em memória o cursor do grupo da mensagem (id e horário de envio)"""
+        if message_data.get('mid') is not None:
+            self.cursor_store.advance(message_data['group'], message_data['mid'], message_data.get('sent_at'))
+    
+    def save_cursors(self):
+        """Persiste os cursores que avançaram (uma gravação por lote/rodada)"""
+        self.cursor_store.flush()
+    
+    def _process_message(self, current_message: Dict) -> Optional[Dict]:
+        """Aplica deduplicação e extrai informações de aposta de uma mensagem"""
+        self._advance_cursor(current_message)
+        
+        # Verificar se é uma nova mensagem (índice persistente sobrevive a reinícios;
+        # sem id nem horário de envio o ID é só o texto e vale apenas neste processo)
+        persist = has_stable_id(current_message.get('mid'), current_message.get('sent_at'))
+        if self.seen_messages.add(current_message['id'], persist=persist):
+            
+            logger.info(f"Nova mensagem detectada em {current_message['group']}!")
+            logger.info(f"Texto: {current_message['text'][:100]}...")
+            
+            # Novo trace por mensagem, propagado junto com a aposta
+            detected_at = clock.time()
+            trace_id = tracer.new_trace_id()
+            if current_message.get('sent_at'):
+                tracer.record('signal.detection_lag', detected_at - current_message['sent_at'], trace_id=trace_id)
+            
+            # Atualizar última mensagem
+            self.last_message_id = current_message['id']
+            self.last_message_text = current_message['text']
+            
+            # Extrair informações de aposta
+            with tracer.trace(trace_id):
+                bet_info = MessageParser.extract_bet_info(current_message['text'])
+            
+            if bet_info:
+                # Adicionar link se encontrado na mensagem
+                if current_message['link']:
+                    bet_info['link'] = current_message['link']
+                
+                bet_info['message_data'] = current_message
+                bet_info['group'] = current_message['group']
+                bet_info['trace_id'] = trace_id
+                bet_info['detected_at'] = detected_at
+                logger.info(f"Informações de aposta extraídas: {bet_info}")
+                return bet_info
+            else:
+                logger.info("Mensagem não contém informações de aposta válidas")
+        
+        return None
+    
+    def _dispatch(self, bet_info: Dict, callback_function):
+        """Entrega a aposta detectada ao callback"""
+        logger.info("Nova aposta detectada, executando callback...")
+        try:
+            callback_function(bet_info)
+        except Exception as e:
+            logger.error(f"Erro no callback: {e}")
+
+def create_message_source() -> MessageSource:
+    """Instancia o backend configurado em Config.MESSAGE_SOURCE"""
+    # Imports tardios: o backend HTTP não precisa carregar o Selenium
+    if Config.MESSAGE_SOURCE not in MESSAGE_SOURCES:
+        raise ValueError(f"MESSAGE_SOURCE inválido: {Config.MESSAGE_SOURCE}")
+    
+    if Config.MESSAGE_SOURCE == 'http':
+        from http_source import HttpMessageSource
+        return HttpMessageSource(Config.MESSAGE_SOURCE_URL, Config.MESSAGE_SOURCE_CHAT)
+    
+    from telegram_watcher import TelegramWatcher
+    return TelegramWatcher()
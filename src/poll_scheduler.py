@@ -0,0 +1,158 @@
+
+import math
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from loguru import logger
+
+from clock import clock
+from config import Config
+
+def parse_windows(spec: str) -> List[Tuple[int, int]]:
+    """Converte 'HH:MM-HH:MM,...' em intervalos de minutos do dia (podem cruzar a meia-noite)"""
+    windows = []
+    for item in (spec or '').split(','):
+        if not item.strip():
+            continue
+        start, end = item.strip().split('-')
+        windows.append(tuple(int(h) * 60 + int(m) for h, m in (part.strip().split(':') for part in (start, end))))
+    return windows
+
+class AdaptivePollScheduler:
+    """
+    Intervalo de polling por grupo a partir da taxa de chegada de mensagens
+    (média móvel exponencial no tempo): curto em períodos movimentados e nas
+    janelas de jogos configuradas, longo quando o grupo está parado, sempre
+    entre os limites mínimo e máximo. Erros consecutivos dobram a espera.
+    """
+    
+    # Crescimento máximo do intervalo por verificação (recuo gradual quando ocioso)
+    BACKOFF_FACTOR = 1.5
+    
+    def __init__(self, min_interval: float = None, max_interval: float = None, initial_interval: float = None,
+                 rate_window: float = None, target_messages: float = None, kickoff_windows: str = None):
+        self.min_interval = Config.POLL_MIN_INTERVAL_SECONDS if min_interval is None else min_interval
+        self.max_interval = Config.POLL_MAX_INTERVAL_SECONDS if max_interval is None else max_interval
+        self.initial_interval = Config.CHECK_INTERVAL_SECONDS if initial_interval is None else initial_interval
+        self.rate_window = Config.POLL_RATE_WINDOW_SECONDS if rate_window is None else rate_window
+        self.target_messages = Config.POLL_TARGET_MESSAGES if target_messages is None else target_messages
+        self.kickoff_windows = parse_windows(Config.KICKOFF_WINDOWS if kickoff_windows is None else kickoff_windows)
+        self._groups: Dict[str, Dict] = {}
+    
+    def _state(self, group: str) -> Dict:
+        """Estado do grupo (criado no primeiro uso, com verificação imediata)"""
+        if group not in self._groups:
+            self._groups[group] = {
+                'rate': 0.0,
+                'updated_at': None,
+                'since': None,
+                'interval': self._clamp(self.initial_interval),
+                'next_poll': 0.0,
+                'errors': 0,
+                'lag': None,
+                'polls': 0,
+            }
+        return self._groups[group]
+    
+    def _clamp(self, interval: float) -> float:
+        """Limita o intervalo a [min_interval, max_interval]"""
+        return min(self.max_interval, max(self.min_interval, interval))
+    
+    def in_kickoff_window(self, now: Optional[float] = None) -> bool:
+        """Horário local dentro de uma janela de jogos (KICKOFF_WINDOWS)"""
+        if not self.kickoff_windows:
+            return False
+        moment = datetime.fromtimestamp(clock.time() if now is None else now)
+        minute = moment.hour * 60 + moment.minute
+        return any(
+            start <= minute < end if start <= end else (minute >= start or minute < end)
+            for start, end in self.kickoff_windows
+        )
+    
+    def _decayed_rate(self, state: Dict, now: float) -> float:
+        """Soma decaída até now das mensagens registradas (por segundo de janela)"""
+        if state['updated_at'] is None:
+            return 0.0
+        return state['rate'] * math.exp(-(now - state['updated_at']) / self.rate_window)
+    
+    def _rate(self, state: Dict, now: float) -> float:
+        """Taxa de mensagens por segundo, corrigida enquanto o histórico é menor que a janela"""
+        if state['since'] is None:
+            return 0.0
+        coverage = 1 - math.exp(-(now - state['since']) / self.rate_window)
+        return self._decayed_rate(state, now) / coverage
+    
+    def record_poll(self, group: str, messages: List[Dict], now: Optional[float] = None) -> float:
+        """Registra uma verificação e retorna o próximo intervalo do grupo"""
+        now = clock.time() if now is None else now
+        state = self._state(group)
+        
+        # A primeira verificação cobre o intervalo inicial
+        if state['since'] is None:
+            state['since'] = now - state['interval']
+        state['rate'] = self._decayed_rate(state, now) + len(messages) / self.rate_window
+        state['updated_at'] = now
+        rate = self._rate(state, now)
+        state['errors'] = 0
+        state['polls'] += 1
+        
+        # Atraso de detecção observado (envio -> leitura), média móvel
+        for message in messages:
+            if message.get('sent_at'):
+                lag = max(0.0, now - message['sent_at'])
+                state['lag'] = lag if state['lag'] is None else 0.8 * state['lag'] + 0.2 * lag
+        
+        # Intervalo com ~target_messages novas mensagens por verificação; encurta na
+        # hora, mas cresce no máximo BACKOFF_FACTOR por verificação
+        if self.in_kickoff_window(now):
+            interval = self.min_interval
+        else:
+            rate_interval = self.target_messages / rate if rate > 0 else self.max_interval
+            interval = self._clamp(min(rate_interval, state['interval'] * self.BACKOFF_FACTOR))
+        
+        if abs(interval - state['interval']) >= 1:
+            logger.debug(f"Intervalo de polling de {group}: {state['interval']:.0f}s -> {interval:.0f}s")
+        state['interval'] = interval
+        state['next_poll'] = now + interval
+        return interval
+    
+    def record_error(self, group: str, now: Optional[float] = None) -> float:
+        """Registra falha na verificação e retorna a espera (backoff exponencial limitado)"""
+        now = clock.time() if now is None else now
+        state = self._state(group)
+        state['errors'] += 1
+        delay = min(self.max_interval, state['interval'] * 2 ** state['errors'])
+        state['next_poll'] = now + delay
+        return delay
+    
+    def record_success(self, group: str):
+        """Leitura bem-sucedida fora do polling (ex.: modo push): zera os erros consecutivos"""
+        self._state(group)['errors'] = 0
+    
+    def interval(self, group: str) -> float:
+        """Intervalo atual do grupo"""
+        return self._state(group)['interval']
+    
+    def due_groups(self, groups: List[str], now: Optional[float] = None) -> List[str]:
+        """Grupos com verificação vencida, os mais atrasados primeiro"""
+        now = clock.time() if now is None else now
+        due = [group for group in groups if self._state(group)['next_poll'] <= now]
+        return sorted(due, key=lambda group: self._groups[group]['next_poll'])
+    
+    def time_until_next(self, groups: List[str], now: Optional[float] = None) -> float:
+        """Segundos até a próxima verificação vencer"""
+        now = clock.time() if now is None else now
+        return max(0.0, min(self._state(group)['next_poll'] for group in groups) - now)
+    
+    def get_metrics(self, now: Optional[float] = None) -> Dict[str, Dict]:
+        """Intervalo atual, taxa de mensagens e atraso de detecção observado por grupo"""
+        now = clock.time() if now is None else now
+        return {
+            group: {
+                'interval_seconds': round(state['interval'], 1),
+                'messages_per_minute': round(self._rate(state, now) * 60, 2),
+                'detection_lag_seconds': None if state['lag'] is None else round(state['lag'], 1),
+                'polls': state['polls'],
+                'errors': state['errors'],
+            }
+            for group, state in self._groups.items()
+        }
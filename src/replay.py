@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Replay offline do pipeline completo
+Reproduz um histórico gravado (exportação do Telegram ou log JSONL) por uma
+MessageSource, BettingAutomationSystem e BetPipeline até um executor
+simulado, em um relógio virtual (velocidade máxima ou N× o tempo real)
+"""
+
+import sys
+import time
+import random
+import tempfile
+import argparse
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+from loguru import logger
+
+# Adicionar src ao path
+sys.path.append(str(Path(__file__).parent))
+
+from bet_pipeline import BetPipeline
+from clock import VirtualClock, clock
+from config import Config
+from main import BettingAutomationSystem
+from message_source import MessageSource
+from poll_scheduler import AdaptivePollScheduler
+from signal_archive import iter_messages
+from tracing import tracer
+from utils import MessageParser
+
+# Modos de leitura do chat reproduzidos
+REPLAY_MODES = ('push', 'cursor', 'adaptive', 'latest')
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Percentil por ranking mais próximo"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, int(round(pct / 100 * len(ordered))) - 1)
+    return round(ordered[min(index, len(ordered) - 1)], 3)
+
+class ReplayWatcher(MessageSource):
+    """
+    Origem de mensagens alimentada por um histórico gravado, sem navegador.
+    Cada mensagem fica visível no chat a partir do seu sent_at no relógio virtual:
+    - push: cada mensagem é entregue no instante em que chega (MutationObserver)
+    - cursor: polling de todas as mensagens desde o cursor (check_for_new_messages)
+    - adaptive: polling desde o cursor com intervalo do AdaptivePollScheduler
+    - latest: polling apenas da última mensagem (check_for_new_message)
+    """
+    
+    def __init__(self, messages: Iterable[Dict], virtual_clock: VirtualClock, seen_file: str,
+                 mode: str = 'push', check_interval: float = None):
+        if mode not in REPLAY_MODES:
+            raise ValueError(f"Modo de replay inválido: {mode}")
+        
+        # Cursor persistido ao lado do índice de mensagens (diretório temporário do replay)
+        super().__init__(seen_file, str(Path(seen_file).with_name('watcher_cursor.json')))
+        
+        self.virtual_clock = virtual_clock
+        self.mode = mode
+        self.check_interval = Config.CHECK_INTERVAL_SECONDS if check_interval is None else check_interval
+        self._messages = iter(messages)
+        self._next = None
+        self._arrived = []
+        self._latest = None
+        self._exhausted = False
+        
+        # Totais do histórico para o relatório
+        self.scheduler = AdaptivePollScheduler()
+        self.polls = 0
+        self.messages_total = 0
+        self.signals_total = 0
+        self.first_sent_at = None
+        self.last_sent_at = None
+    
+    def _peek(self) -> Optional[Dict]:
+        """Próxima mensagem do histórico (ainda não chegou ao chat)"""
+        if self._next is None and not self._exhausted:
+            for message in self._messages:
+                if message.get('sent_at') is None:
+                    message = dict(message, sent_at=self.last_sent_at or self.virtual_clock.time())
+                self._next = message
+                break
+            else:
+                self._exhausted = True
+        return self._next
+    
+    def _deliver_arrivals(self):
+        """Move para o chat as mensagens com sent_at até o instante virtual atual"""
+        now = self.virtual_clock.time()
+        while self._peek() is not None and self._next['sent_at'] <= now:
+            message, self._next = self._next, None
+            self.messages_total += 1
+            if MessageParser.compiled.parse(message['text']):
+                self.signals_total += 1
+            if self.first_sent_at is None:
+                self.first_sent_at = message['sent_at']
+            self.last_sent_at = message['sent_at']
+            
+            self._latest = message
+            if self.mode != 'latest':
+                self._arrived.append(message)
+    
+    def get_latest_message(self) -> Optional[Dict]:
+        """Última mensagem visível no chat"""
+        self.polls += 1
+        self._deliver_arrivals()
+        if not self._latest:
+            return None
+        message = self._latest
+        return self._build_message_data(message['text'], message['link'] or '', message['mid'], message['sent_at'])
+    
+    def get_new_messages(self) -> List[Dict]:
+        """Mensagens chegadas desde a última leitura, pelo mesmo cursor do modo ao vivo"""
+        self.polls += 1
+        self._deliver_arrivals()
+        raw_messages = [
+            {'mid': message['mid'], 'ts': message['sent_at'], 'text': message['text'],
+             'link': message['link'] or '', 'sel': None}
+            for message in self._arrived
+        ]
+        self._arrived = []
+        return self._accept_raw_messages(raw_messages)
+    
+    def start_monitoring(self, callback_function):
+        """Reproduz o histórico até o fim e aguarda o processamento das apostas pendentes"""
+        logger.info(f"Replay iniciado - modo {self.mode}")
+        
+        while self._peek() is not None:
+            if self.mode == 'push':
+                clock.sleep(self._next['sent_at'] - clock.time())
+                bet_infos = self.check_for_new_messages()
+            elif self.mode == 'cursor':
+                clock.sleep(self.check_interval)
+                bet_infos = self.check_for_new_messages()
+            elif self.mode == 'adaptive':
+                clock.sleep(self.scheduler.time_until_next([self.group]))
+                messages = self.get_new_messages()
+                self.scheduler.record_poll(self.group, messages)
+                bet_infos = [bet_info for bet_info in map(self._process_message, messages) if bet_info]
+                self.save_cursors()
+            else:
+                clock.sleep(self.check_interval)
+                bet_infos = [bet_info for bet_info in [self.check_for_new_message()] if bet_info]
+            
+            for bet_info in bet_infos:
+                self._dispatch(bet_info, callback_function)
+        
+        self.virtual_clock.drain()
+        logger.info(f"Replay concluído - {self.messages_total} mensagens")
+        return True
+    
+    def close(self):
+        """Nada a fechar no replay"""
+        logger.info("Replay Watcher fechado")
+
+class StubBetExecutor:
+    """Executor simulado: consome no relógio o tempo de uma aposta, sem navegador"""
+    
+    def __init__(self, min_seconds: float = 3.0, max_seconds: float = 8.0,
+                 failure_rate: float = 0.0, seed: Optional[int] = None):
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.results = []
+    
+    def start(self):
+        """Sem navegadores para abrir"""
+    
+    def start_keep_alive(self, interval_seconds: float):
+        """Sem sessões para manter"""
+    
+    def execute_bet(self, bet_info: Dict) -> bool:
+        """Simula a execução (navegação, preenchimento e confirmação)"""
+        with self._lock:
+            duration = self._rng.uniform(self.min_seconds, self.max_seconds)
+        clock.sleep(duration)
+        
+        with self._lock:
+            success = self._rng.random() >= self.failure_rate
+            self.results.append({
+                'sent_at': bet_info['message_data'].get('sent_at'),
+                'detected_at': bet_info['detected_at'],
+                'finished_at': clock.time(),
+                'success': success,
+            })
+        return success
+    
+    def close(self):
+        """Nada a fechar no executor simulado"""
+
+class ReplaySystem(BettingAutomationSystem):
+    """BettingAutomationSystem com watcher e executor de replay em relógio virtual"""
+    
+    def __init__(self, source_file: str, mode: str = 'push', speed: Optional[float] = None,
+                 check_interval: float = None, pool_size: int = None, queue_size: int = None,
+                 execution_seconds=(3.0, 8.0), failure_rate: float = 0.0, seed: Optional[int] = None):
+        self.source_file = source_file
+        self.mode = mode
+        self.speed = speed
+        self.check_interval = check_interval
+        self.pool_size = pool_size or Config.EXECUTOR_POOL_SIZE
+        self.queue_size = queue_size or Config.BET_QUEUE_MAX_SIZE
+        self.execution_seconds = execution_seconds
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self.virtual_clock = None
+        self.detections = []
+        self._messages = None
+        self._tmp_dir = None
+        super().__init__()
+    
+    def _setup_logging(self):
+        """Mantém o logging configurado por quem chamou o replay"""
+    
+    def _pipeline_idle(self, sleeping: int) -> bool:
+        """Todas as apostas em execução estão aguardando o relógio virtual"""
+        if not self.bet_pipeline:
+            return True
+        return sleeping >= min(self.bet_pipeline.queue.unfinished_tasks, self.bet_pipeline.worker_count)
+    
+    def initialize(self) -> bool:
+        """Cria watcher, executor e pipeline do replay"""
+        self.telegram_watcher = ReplayWatcher(
+            self._messages, self.virtual_clock, str(self._tmp_dir / "seen_messages.log"),
+            self.mode, self.check_interval
+        )
+        self.bet_executor = StubBetExecutor(*self.execution_seconds, self.failure_rate, self.seed)
+        self.bet_pipeline = BetPipeline(self._execute_bet_signal, max_size=self.queue_size, workers=self.pool_size)
+        return True
+    
+    def on_new_bet_detected(self, bet_info: dict):
+        """Registra a detecção antes de enfileirar"""
+        self.detections.append(bet_info['detected_at'] - (bet_info['message_data'].get('sent_at') or bet_info['detected_at']))
+        super().on_new_bet_detected(bet_info)
+    
+    def run(self) -> Optional[Dict]:
+        """Executa o replay e retorna o relatório"""
+        messages = iter_messages(self.source_file)
+        first = next(messages, None)
+        if first is None:
+            logger.error(f"Histórico sem mensagens: {self.source_file}")
+            return None
+        
+        def stream() -> Iterator[Dict]:
+            yield first
+            yield from messages
+        
+        # Relógio criado na thread condutora (a que executa o monitoramento)
+        self._messages = stream()
+        self.virtual_clock = VirtualClock(first.get('sent_at') or 0.0, self.speed, self._pipeline_idle)
+        
+        # Spans do replay não devem se misturar ao histórico de latência real
+        tracing_enabled = tracer.enabled
+        tracer.enabled = False
+        started = time.perf_counter()
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir, clock.use(self.virtual_clock):
+                self._tmp_dir = Path(tmp_dir)
+                self.start()
+        finally:
+            tracer.enabled = tracing_enabled
+        
+        if not self.telegram_watcher:
+            return None
+        return self.report(time.perf_counter() - started)
+    
+    def report(self, wall_seconds: float) -> Dict:
+        """Sinais perdidos, latências (tempo virtual) e throughput do replay"""
+        watcher = self.telegram_watcher
+        metrics = self.bet_pipeline.get_metrics()
+        results = self.bet_executor.results
+        executed = sum(1 for result in results if result['success'])
+        signals = watcher.signals_total
+        virtual_seconds = (watcher.last_sent_at or 0) - (watcher.first_sent_at or 0)
+        
+        return {
+            'mode': self.mode,
+            'check_interval_seconds': watcher.check_interval,
+            'pool_size': self.pool_size,
+            'queue_size': self.queue_size,
+            'messages': watcher.messages_total,
+            'polls': watcher.polls,
+            'signals': signals,
+            'detected': len(self.detections),
+            'rejected': metrics['rejected'],
+            'executed': executed,
+            'failed': len(results) - executed,
+            'missed_signal_rate': round(1 - executed / signals, 4) if signals else 0.0,
+            'detection_lag_p50': percentile(self.detections, 50),
+            'detection_lag_p95': percentile(self.detections, 95),
+            'queue_wait_max': round(metrics['max_wait_seconds'], 3),
+            'signal_to_confirmation_p50': percentile([r['finished_at'] - r['sent_at'] for r in results if r['sent_at']], 50),
+            'signal_to_confirmation_p95': percentile([r['finished_at'] - r['sent_at'] for r in results if r['sent_at']], 95),
+            'virtual_seconds': round(virtual_seconds, 1),
+            'wall_seconds': round(wall_seconds, 3),
+            'speedup': round(virtual_seconds / wall_seconds, 1) if wall_seconds else None,
+            'messages_per_second': round(watcher.messages_total / wall_seconds, 1) if wall_seconds else None,
+        }
+
+def main():
+    """Replay pela linha de comando"""
+    parser = argparse.ArgumentParser(description="Reproduz um histórico pelo pipeline com relógio virtual")
+    parser.add_argument('file', help="result.json do Telegram Desktop ou log .jsonl")
+    parser.add_argument('--mode', choices=REPLAY_MODES, default='push', help="Leitura do chat a simular")
+    parser.add_argument('--speed', type=float, default=0, help="Múltiplo do tempo real (0 = velocidade máxima)")
+    parser.add_argument('--interval', type=float, default=None, help="CHECK_INTERVAL_SECONDS simulado")
+    parser.add_argument('--pool', type=int, default=None, help="EXECUTOR_POOL_SIZE simulado")
+    parser.add_argument('--queue', type=int, default=None, help="BET_QUEUE_MAX_SIZE simulado")
+    parser.add_argument('--exec-min', type=float, default=3.0, help="Duração mínima de uma aposta (s)")
+    parser.add_argument('--exec-max', type=float, default=8.0, help="Duração máxima de uma aposta (s)")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="Fração de apostas que falham")
+    parser.add_argument('--seed', type=int, default=None, help="Semente para resultados reproduzíveis")
+    parser.add_argument('--log-level', default='ERROR', help="Nível de log durante o replay")
+    args = parser.parse_args()
+    
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+    
+    system = ReplaySystem(
+        args.file, mode=args.mode, speed=args.speed or None, check_interval=args.interval,
+        pool_size=args.pool, queue_size=args.queue, execution_seconds=(args.exec_min, args.exec_max),
+        failure_rate=args.failure_rate, seed=args.seed
+    )
+    report = system.run()
+    if report is None:
+        sys.exit(1)
+    
+    print("="*60)
+    print("    RELATÓRIO DO REPLAY")
+    print("="*60)
+    for key, value in report.items():
+        print(f"{key:<28} {value}")
+
+if __name__ == "__main__":
+    main()
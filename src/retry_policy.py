@@ -0,0 +1,122 @@
+
+import random
+from typing import Callable, Dict, Optional, Sequence, Tuple, Type
+from selenium.common.exceptions import InvalidArgumentException, TimeoutException, WebDriverException
+from loguru import logger
+
+from clock import clock
+from config import Config
+from tracing import tracer
+
+class DeadlineExceeded(Exception):
+    """Operação abandonada: não termina antes do prazo do sinal"""
+
+class Deadline:
+    """Prazo absoluto (clock.time) até o qual um sinal ainda vale a pena ser apostado"""
+    
+    def __init__(self, expires_at: Optional[float]):
+        self.expires_at = expires_at
+    
+    @classmethod
+    def for_signal(cls, bet_info: Dict) -> 'Deadline':
+        """Prazo a partir da detecção do sinal (SIGNAL_DEADLINE_SECONDS; 0 = sem prazo)"""
+        detected_at = bet_info.get('detected_at')
+        if not detected_at or Config.SIGNAL_DEADLINE_SECONDS <= 0:
+            return cls(None)
+        return cls(detected_at + Config.SIGNAL_DEADLINE_SECONDS)
+    
+    def remaining(self) -> float:
+        """Segundos até o prazo (infinito sem prazo)"""
+        if self.expires_at is None:
+            return float('inf')
+        return self.expires_at - clock.time()
+    
+    def expired(self) -> bool:
+        """Prazo já vencido"""
+        return self.remaining() <= 0
+    
+    def check(self, stage: str):
+        """Abandona a operação se o prazo venceu antes da etapa"""
+        if self.expired():
+            raise DeadlineExceeded(f"prazo do sinal vencido há {-self.remaining():.1f}s antes de {stage}")
+
+# Sem prazo (login, keep-alive)
+NO_DEADLINE = Deadline(None)
+
+class RetryRule:
+    """Regra de retry de uma classe de erro: tentativas e backoff exponencial"""
+    
+    def __init__(self, max_attempts: int = None, base_delay: float = None, max_delay: float = None,
+                 retryable: bool = True):
+        self.max_attempts = Config.MAX_RETRIES if max_attempts is None else max_attempts
+        self.base_delay = Config.RETRY_BASE_DELAY_SECONDS if base_delay is None else base_delay
+        self.max_delay = Config.RETRY_MAX_DELAY_SECONDS if max_delay is None else max_delay
+        self.retryable = retryable
+    
+    def delay(self, attempt: int) -> float:
+        """Espera antes da próxima tentativa (backoff exponencial com jitter)"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+class RetryPolicy:
+    """
+    Executa operações com retry segundo regras por classe de erro (a primeira
+    regra cuja classe casar com o erro vale). Com um prazo, uma nova tentativa
+    só é feita se a espera mais a duração da tentativa anterior couberem antes
+    dele; caso contrário a operação é abandonada com DeadlineExceeded.
+    """
+    
+    def __init__(self, name: str, rules: Sequence[Tuple[Type[BaseException], RetryRule]] = (),
+                 default: Optional[RetryRule] = None):
+        self.name = name
+        self.rules = list(rules)
+        self.default = default or RetryRule()
+    
+    def rule_for(self, error: BaseException) -> RetryRule:
+        """Regra aplicável ao erro"""
+        for error_class, rule in self.rules:
+            if isinstance(error, error_class):
+                return rule
+        return self.default
+    
+    def run(self, func: Callable, *args, deadline: Deadline = NO_DEADLINE, max_attempts: Optional[int] = None,
+            on_error: Optional[Callable[[int, BaseException], None]] = None, **kwargs):
+        """Executa func até ter sucesso, esgotar as tentativas da regra ou o prazo"""
+        attempt = 0
+        while True:
+            deadline.check(self.name)
+            attempt += 1
+            started = clock.time()
+            try:
+                return func(*args, **kwargs)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                if on_error:
+                    on_error(attempt, e)
+                
+                rule = self.rule_for(e)
+                limit = rule.max_attempts if max_attempts is None else min(max_attempts, rule.max_attempts)
+                if not rule.retryable or attempt >= limit:
+                    logger.warning(f"{self.name}: tentativa {attempt}/{limit} falhou, sem novas tentativas: {e}")
+                    raise
+                
+                delay = rule.delay(attempt)
+                needed = delay + (clock.time() - started)
+                if needed > deadline.remaining():
+                    tracer.record(f'retry.{self.name}.abandoned', clock.time() - started, ok=False)
+                    raise DeadlineExceeded(
+                        f"{self.name} abandonado após {attempt} tentativa(s): próxima precisaria de "
+                        f"{needed:.1f}s, restam {max(0.0, deadline.remaining()):.1f}s do prazo do sinal"
+                    ) from e
+                
+                logger.warning(f"{self.name}: tentativa {attempt}/{limit} falhou ({type(e).__name__}: {e}), "
+                               f"nova tentativa em {delay:.1f}s")
+                clock.sleep(delay)
+
+# Navegação: timeouts e falhas do navegador são transitórios; URL inválida não adianta repetir
+NAVIGATION_POLICY = RetryPolicy('navigate', rules=[
+    (InvalidArgumentException, RetryRule(retryable=False)),
+    (TimeoutException, RetryRule()),
+    (WebDriverException, RetryRule()),
+])
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Arquivo de sinais históricos
+Importa exportações do Telegram Desktop (result.json) ou logs JSONL de
+mensagens para um banco SQLite consultável, em streaming e com memória constante
+"""
+
+import re
+import sys
+import json
+import math
+import time
+import sqlite3
+import argparse
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from loguru import logger
+
+# Adicionar src ao path
+sys.path.append(str(Path(__file__).parent))
+
+from config import Config
+from utils import MessageParser, build_message_id
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+class StreamingJSONReader:
+    """Decodificador JSON incremental: lê o arquivo em blocos e decodifica um valor por vez"""
+    
+    def __init__(self, handle, chunk_size: int = 65536):
+        self.handle = handle
+        self.chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+    
+    def _read_more(self) -> bool:
+        """Descarta o trecho já consumido e lê o próximo bloco"""
+        if self._eof:
+            return False
+        
+        # Bloco cresce junto com o buffer para valores maiores que chunk_size
+        chunk = self.handle.read(max(self.chunk_size, len(self._buffer) - self._pos))
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        if not chunk:
+            self._eof = True
+        return bool(chunk)
+    
+    def peek(self) -> str:
+        """Próximo caractere não branco (vazio no fim do arquivo)"""
+        while True:
+            self._pos = WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer) or not self._read_more():
+                return self._buffer[self._pos:self._pos + 1]
+    
+    def expect(self, char: str):
+        """Consome o caractere estrutural esperado"""
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"JSON inválido: esperado {char!r}, encontrado {found!r}")
+        self._pos += 1
+    
+    def decode(self):
+        """Decodifica o próximo valor completo, lendo mais blocos se necessário"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._read_more():
+                    raise
+                continue
+            
+            # Número no fim do buffer pode estar cortado
+            if end == len(self._buffer) and self._read_more():
+                continue
+            
+            self._pos = end
+            return value
+    
+    def iter_array(self, key: str) -> Iterator:
+        """Itera os itens do array `key` do objeto raiz sem carregar o arquivo inteiro"""
+        self.expect('{')
+        while self.peek() not in ('}', ''):
+            name = self.decode()
+            self.expect(':')
+            if name != key:
+                self.decode()
+            else:
+                self.expect('[')
+                while self.peek() != ']':
+                    yield self.decode()
+                    if self.peek() == ',':
+                        self._pos += 1
+                return
+            
+            if self.peek() == ',':
+                self._pos += 1
+        
+        raise ValueError(f"Lista '{key}' não encontrada no arquivo")
+
+def _flatten_text(raw_text) -> Tuple[str, Optional[str]]:
+    """Texto da exportação (string ou lista de trechos/entidades) e primeiro link"""
+    if isinstance(raw_text, str):
+        return raw_text, None
+    
+    parts = []
+    link = None
+    for entity in raw_text or []:
+        if isinstance(entity, str):
+            parts.append(entity)
+            continue
+        
+        parts.append(entity.get('text', ''))
+        if link is None:
+            if entity.get('href'):
+                link = entity['href']
+            elif entity.get('type') == 'link':
+                link = entity.get('text')
+    return ''.join(parts), link
+
+def normalize_message(raw: Dict) -> Optional[Dict]:
+    """
+    Converte mensagem da exportação do Telegram ou do log JSONL para o formato
+    do TelegramWatcher (text, link, mid, sent_at). Retorna None para mensagens
+    de serviço ou sem texto.
+    """
+    if raw.get('type', 'message') != 'message':
+        return None
+    
+    text, link = _flatten_text(raw.get('text', ''))
+    if not text.strip():
+        return None
+    
+    mid = raw.get('mid')
+    if mid is None and isinstance(raw.get('id'), int):
+        mid = raw['id']
+    
+    sent_at = raw.get('sent_at')
+    if sent_at is None and raw.get('date_unixtime'):
+        sent_at = float(raw['date_unixtime'])
+    elif sent_at is None and raw.get('date'):
+        sent_at = datetime.fromisoformat(raw['date']).timestamp()
+    
+    return {
+        'mid': mid,
+        'sent_at': sent_at,
+        'text': text,
+        'link': raw.get('link') or link,
+    }
+
+def iter_messages(path: str, chunk_size: int = 65536) -> Iterator[Dict]:
+    """Mensagens normalizadas de uma exportação JSON (result.json) ou de um log JSONL"""
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.suffix == '.jsonl':
+            raw_messages = (json.loads(line) for line in f if line.strip())
+        else:
+            raw_messages = StreamingJSONReader(f, chunk_size).iter_array('messages')
+        
+        for raw in raw_messages:
+            message = normalize_message(raw)
+            if message:
+                yield message
+
+def chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    """Agrupa um iterável em listas de até `size` itens"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+class SignalArchive:
+    """Arquivo SQLite de sinais extraídos de históricos de grupos"""
+    
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS signals (
+        message_id TEXT PRIMARY KEY,
+        source TEXT NOT NULL,
+        mid INTEGER,
+        sent_at REAL,
+        valor REAL NOT NULL,
+        link TEXT NOT NULL,
+        odds REAL,
+        evento TEXT,
+        text TEXT NOT NULL
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS signals_source_sent_at ON signals (source, sent_at);
+    """
+    
+    def __init__(self, db_file: str):
+        self.db_file = Path(db_file)
+        self._conn = sqlite3.connect(self.db_file)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(self.SCHEMA)
+    
+    def _signal_rows(self, messages: List[Dict], source: str) -> List[Tuple]:
+        """Extrai apostas de um lote de mensagens (parsing colunar)"""
+        parsed = MessageParser.extract_batch([message['text'] for message in messages])
+        
+        rows = []
+        for message, signal in zip(messages, parsed.itertuples(index=False)):
+            if not signal.parse_ok:
+                continue
+            
+            # Link da mensagem tem prioridade, como no monitoramento ao vivo
+            rows.append((
+                build_message_id(source, message['text'], message['mid'], message['sent_at']),
+                source,
+                message['mid'],
+                message['sent_at'],
+                signal.valor_numerico,
+                message['link'] or signal.link,
+                None if math.isnan(signal.odds) else signal.odds,
+                signal.evento,
+                message['text'],
+            ))
+        return rows
+    
+    def ingest(self, path: str, source: Optional[str] = None, batch_size: int = 10000) -> Dict:
+        """Importa um histórico em lotes; mensagens já arquivadas são ignoradas"""
+        source = source or Path(path).stem
+        started = time.perf_counter()
+        stats = {'messages': 0, 'signals': 0, 'inserted': 0}
+        
+        for batch in chunked(iter_messages(path), batch_size):
+            rows = self._signal_rows(batch, source)
+            with self._conn:
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO signals VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+                stats['inserted'] += self._conn.total_changes - before
+            
+            stats['messages'] += len(batch)
+            stats['signals'] += len(rows)
+            logger.debug(f"{stats['messages']} mensagens processadas, {stats['signals']} sinais")
+        
+        stats['seconds'] = round(time.perf_counter() - started, 3)
+        logger.info(
+            f"Histórico {path} importado como '{source}': {stats['messages']} mensagens, "
+            f"{stats['signals']} sinais ({stats['inserted']} novos) em {stats['seconds']}s"
+        )
+        return stats
+    
+    def count(self, source: Optional[str] = None) -> int:
+        """Quantidade de sinais arquivados"""
+        if source is None:
+            return self._conn.execute("SELECT COUNT(*) FROM signals").fetchone()[0]
+        return self._conn.execute("SELECT COUNT(*) FROM signals WHERE source = ?", (source,)).fetchone()[0]
+    
+    def sources(self) -> Dict[str, int]:
+        """Sinais por origem"""
+        rows = self._conn.execute("SELECT source, COUNT(*) FROM signals GROUP BY source ORDER BY source")
+        return {source: count for source, count in rows}
+    
+    def iter_signals(self, source: Optional[str] = None, since: Optional[float] = None,
+                     until: Optional[float] = None) -> Iterator[Dict]:
+        """Sinais em ordem de envio, filtrados por origem e intervalo (timestamps)"""
+        query = "SELECT * FROM signals WHERE 1 = 1"
+        params = []
+        if source is not None:
+            query += " AND source = ?"
+            params.append(source)
+        if since is not None:
+            query += " AND sent_at >= ?"
+            params.append(since)
+        if until is not None:
+            query += " AND sent_at < ?"
+            params.append(until)
+        
+        for row in self._conn.execute(query + " ORDER BY sent_at, mid", params):
+            yield dict(row)
+    
+    def close(self):
+        """Fecha o banco"""
+        self._conn.close()
+
+def main():
+    """Importa históricos pela linha de comando"""
+    parser = argparse.ArgumentParser(description="Importa históricos do Telegram para o arquivo de sinais")
+    parser.add_argument('files', nargs='+', help="result.json do Telegram Desktop ou log .jsonl")
+    parser.add_argument('--source', help="Nome da origem (padrão: nome do arquivo)")
+    parser.add_argument('--db', default=Config.SIGNAL_ARCHIVE_FILE, help="Arquivo SQLite de destino")
+    args = parser.parse_args()
+    
+    archive = SignalArchive(args.db)
+    try:
+        for path in args.files:
+            archive.ingest(path, source=args.source)
+        logger.info(f"Sinais arquivados por origem: {archive.sources()}")
+    finally:
+        archive.close()
+
+if __name__ == "__main__":
+    main()
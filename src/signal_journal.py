@@ -0,0 +1,160 @@
+
+import os
+import json
+import threading
+from pathlib import Path
+from typing import Dict, List
+from loguru import logger
+
+from bet_ledger import idempotency_key
+from clock import clock
+from config import Config
+from retry_policy import Deadline
+
+class SignalJournal:
+    """
+    Journal de escrita antecipada dos sinais: cada aposta extraída é anexada
+    antes de ir para a fila de execução e marcada como concluída depois dela.
+    Após uma queda, os sinais sem conclusão são devolvidos para reexecução.
+    
+    Cada registro é gravado no arquivo imediatamente (sobrevive à queda do
+    processo); o fsync é feito em lote por uma thread própria a cada
+    fsync_interval. Quando o arquivo acumula compact_records registros, ele é
+    reescrito apenas com os sinais em aberto, mantendo tamanho e custo constantes.
+    """
+    
+    def __init__(self, journal_file: str, fsync_interval: float = None, compact_records: int = None):
+        self.journal_file = Path(journal_file)
+        self.fsync_interval = Config.JOURNAL_FSYNC_INTERVAL_SECONDS if fsync_interval is None else fsync_interval
+        self.compact_records = Config.JOURNAL_COMPACT_RECORDS if compact_records is None else compact_records
+        self._lock = threading.Lock()
+        self._open: Dict[str, Dict] = {}
+        self._records = 0
+        self._dirty = False
+        self._stop_event = threading.Event()
+        
+        self._read()
+        self._compact()
+        
+        self._syncer = threading.Thread(target=self._sync_loop, name="signal-journal-sync", daemon=True)
+        self._syncer.start()
+    
+    def _read(self):
+        """Reconstrói os sinais em aberto a partir do journal"""
+        if not self.journal_file.exists():
+            return
+        
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Última linha incompleta (queda durante a gravação)
+                    logger.warning("Registro incompleto no journal de sinais ignorado")
+                    continue
+                if record['op'] == 's':
+                    self._open[record['k']] = record
+                else:
+                    self._open.pop(record['k'], None)
+    
+    def _compact(self):
+        """Reescreve o journal só com os sinais em aberto (troca atômica)"""
+        tmp_file = self.journal_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(record, separators=(',', ':'), default=str) + '\n' for record in self._open.values())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.journal_file)
+        
+        self._file = open(self.journal_file, 'a', encoding='utf-8')
+        self._records = len(self._open)
+    
+    def _append(self, record: Dict):
+        """Anexa um registro (chamado com o lock)"""
+        self._file.write(json.dumps(record, separators=(',', ':'), default=str) + '\n')
+        self._file.flush()
+        self._records += 1
+        self._dirty = True
+    
+    def append(self, bet_info: Dict):
+        """Registra o sinal antes de enviá-lo para execução"""
+        record = {'op': 's', 'k': idempotency_key(bet_info), 'ts': round(clock.time(), 3), 'bet': bet_info}
+        with self._lock:
+            self._open[record['k']] = record
+            self._append(record)
+    
+    def done(self, bet_info: Dict):
+        """Marca o sinal como concluído (executado, com falha ou descartado)"""
+        key = idempotency_key(bet_info)
+        with self._lock:
+            if self._open.pop(key, None) is not None:
+                self._append({'op': 'd', 'k': key})
+    
+    def recover(self, max_age_seconds: float = None) -> List[Dict]:
+        """
+        Sinais sem conclusão registrados há menos de max_age_seconds, na ordem
+        original. Os mais antigos são descartados (odds e mercados já mudaram),
+        assim como os que já passaram do prazo do sinal (SIGNAL_DEADLINE_SECONDS):
+        com prazo configurado, ele prevalece sobre JOURNAL_MAX_AGE_MINUTES.
+        """
+        max_age = Config.JOURNAL_MAX_AGE_MINUTES * 60 if max_age_seconds is None else max_age_seconds
+        cutoff = clock.time() - max_age
+        
+        def is_expired(record: Dict) -> bool:
+            return record['ts'] < cutoff or Deadline.for_signal(record['bet']).expired()
+        
+        with self._lock:
+            pending = list(self._open.values())
+            expired = [record for record in pending if is_expired(record)]
+            for record in expired:
+                del self._open[record['k']]
+                self._append({'op': 'd', 'k': record['k']})
+        
+        if pending:
+            logger.warning(
+                f"Journal de sinais: {len(pending) - len(expired)} sinal(is) não concluído(s) para reexecução, "
+                f"{len(expired)} descartado(s) por idade (> {max_age / 60:.0f} min) ou prazo do sinal vencido"
+            )
+        expired_keys = {record['k'] for record in expired}
+        return [record['bet'] for record in pending if record['k'] not in expired_keys]
+    
+    def pending_count(self) -> int:
+        """Sinais registrados ainda não concluídos"""
+        with self._lock:
+            return len(self._open)
+    
+    def sync(self):
+        """fsync do lote gravado desde a última chamada e compactação periódica"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, False
+            
+            # Compacta quando os registros concluídos dominam o arquivo (a cópia já é sincronizada)
+            if self._records >= max(self.compact_records, 2 * len(self._open)):
+                self._file.close()
+                self._compact()
+                return
+            
+            fd = os.dup(self._file.fileno()) if dirty else None
+        
+        # fsync fora do lock: anexar um sinal nunca espera o disco
+        if fd is not None:
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+    
+    def _sync_loop(self):
+        """Loop da thread de fsync"""
+        while not self._stop_event.wait(self.fsync_interval):
+            try:
+                self.sync()
+            except Exception as e:
+                logger.error(f"Erro ao sincronizar journal de sinais: {e}")
+    
+    def close(self):
+        """Sincroniza e fecha o journal"""
+        self._stop_event.set()
+        self._syncer.join(timeout=10)
+        self.sync()
+        with self._lock:
+            self._file.close()
@@ -1,8 +1,7 @@
 
 import time
 import json
-from datetime import datetime
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
@@ -10,18 +9,317 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from loguru import logger
 
 from browser_manager import BrowserManager
-from utils import SessionManager, MessageParser, ElementWaiter, human_like_delay, take_screenshot
+from message_source import MessageSource
+from poll_scheduler import AdaptivePollScheduler
+from utils import SessionManager, ElementWaiter, SelectorCache, human_like_delay, take_screenshot
+from clock import clock
 from config import Config
+from tracing import tracer
 
-class TelegramWatcher:
-    """Classe para monitorar mensagens no Telegram Web"""
+# Chave do Telegram Web no cache de seletores
+TELEGRAM_SITE = "web.telegram.org"
+
+# Seletores possíveis para mensagens
+MESSAGE_SELECTORS = [
+    '.message',
+    '.im_message_text',
+    '[data-testid="Message"]',
+    '.chat-message',
+    '.message-content'
+]
+
+# Seletores possíveis para o texto dentro de uma mensagem
+TEXT_SELECTORS = [
+    '.message-text',
+    '.text-content',
+    '.im_message_text',
+    'strong',
+    '.message-content'
+]
+
+# Função JS compartilhada que extrai id (data-mid), timestamp, texto, link e o
+# seletor de texto usado de um nó de mensagem. Espera `textSelectors` no escopo.
+EXTRACT_MESSAGE_JS = """
+const extract = (node) => {
+    const holder = node.closest('[data-mid]') || node.querySelector('[data-mid]');
+    const mid = holder ? Number(holder.getAttribute('data-mid')) : null;
+    const ts = holder ? Number(holder.getAttribute('data-timestamp')) : null;
+    let text = '';
+    let textSelector = null;
+    for (const sel of textSelectors) {
+        const el = node.querySelector(sel);
+        if (el && el.innerText.trim()) { text = el.innerText.trim(); textSelector = sel; break; }
+    }
+    if (!text) { text = (node.innerText || '').trim(); }
+    const a = node.querySelector('a[href]');
+    return {mid: Number.isFinite(mid) ? mid : null, ts: Number.isFinite(ts) ? ts : null,
+            text: text, link: a ? a.href : '', sel: textSelector};
+};
+"""
+
+# Percorre o DOM em ordem inversa de documento a partir do fim do container do
+# chat, sem materializar a lista de mensagens: o custo depende apenas das
+# mensagens mais novas que o cursor, não do histórico carregado. Cada seletor
+# tem o seu orçamento de nós (resetBudget): a primeira mensagem precisa estar
+# entre os últimos FIRST_MATCH_BUDGET nós (um seletor que não existe mais custa
+# só isso) e o percurso inteiro é limitado a WALK_BUDGET. Quando o orçamento
+# acaba antes do fim, `exhausted` indica que o resultado está incompleto.
+REVERSE_WALK_JS = """
+const FIRST_MATCH_BUDGET = 2000;
+const WALK_BUDGET = 20000;
+let walkBudget = WALK_BUDGET;
+let exhausted = false;
+const resetBudget = () => { walkBudget = WALK_BUDGET; exhausted = false; };
+const chatRoot = (containerSelector && document.querySelector(containerSelector)) || document.body;
+const previousNode = (node) => {
+    if (node.previousElementSibling) {
+        node = node.previousElementSibling;
+        while (node.lastElementChild) { node = node.lastElementChild; }
+        return node;
+    }
+    return node.parentElement === chatRoot ? null : node.parentElement;
+};
+const lastNode = () => {
+    let node = chatRoot;
+    while (node.lastElementChild) { node = node.lastElementChild; }
+    return node === chatRoot ? null : node;
+};
+const findPrevious = (node, sel, budget = walkBudget) => {
+    const stopAt = walkBudget - budget;
+    while (node) {
+        if (walkBudget <= stopAt) { exhausted = true; return null; }
+        walkBudget--;
+        if (node.matches(sel)) { return node; }
+        node = previousNode(node);
+    }
+    return null;
+};
+const findLast = (sel) => {
+    resetBudget();
+    return findPrevious(lastNode(), sel, FIRST_MATCH_BUDGET);
+};
+"""
+
+# Extrai em um único round trip todas as mensagens mais novas que o cursor
+# (data-mid). Sem cursor, retorna apenas a última mensagem. Também informa
+# qual seletor de mensagens funcionou, para o cache de seletores, e se o
+# percurso foi truncado pelo orçamento (truncated: ler com FULL_SCAN_SCRIPT),
+# inclusive quando um seletor anterior só falhou por esgotar a primeira busca
+# (o cache põe o seletor que funcionou primeiro e o custo não se repete).
+EXTRACT_NEW_MESSAGES_SCRIPT = """
+const messageSelectors = arguments[0];
+const textSelectors = arguments[1];
+const cursor = arguments[2];
+const containerSelector = arguments[3];
+""" + EXTRACT_MESSAGE_JS + REVERSE_WALK_JS + """
+const result = [];
+let listSelector = null;
+let truncated = false;
+for (const sel of messageSelectors) {
+    let node = findLast(sel);
+    truncated = truncated || exhausted;
+    if (!node) { continue; }
+    listSelector = sel;
+    while (node) {
+        const data = extract(node);
+        if (cursor === null || data.mid === null) {
+            if (!result.length && data.text) { result.push(data); }
+            break;
+        }
+        if (data.mid <= cursor) { break; }
+        if (data.text) { result.push(data); }
+        node = findPrevious(previousNode(node), sel);
+    }
+    truncated = truncated || exhausted;
+    break;
+}
+return {selector: listSelector, messages: result.reverse(), truncated: truncated};
+"""
+
+# Leitura completa do chat (querySelectorAll), usada só quando o percurso reverso
+# é truncado: custo proporcional ao histórico carregado, mas nenhuma mensagem
+# mais nova que o cursor fica para trás
+FULL_SCAN_SCRIPT = """
+const messageSelectors = arguments[0];
+const textSelectors = arguments[1];
+const cursor = arguments[2];
+const containerSelector = arguments[3];
+""" + EXTRACT_MESSAGE_JS + """
+const chatRoot = (containerSelector && document.querySelector(containerSelector)) || document.body;
+for (const sel of messageSelectors) {
+    const nodes = chatRoot.querySelectorAll(sel);
+    if (!nodes.length) { continue; }
+    const result = [];
+    for (const node of nodes) {
+        const data = extract(node);
+        if (data.text && (cursor === null || (data.mid !== null && data.mid > cursor))) { result.push(data); }
+    }
+    return {selector: sel, messages: cursor === null ? result.slice(-1) : result, truncated: false};
+}
+return {selector: null, messages: [], truncated: false};
+"""
+
+# Última mensagem do chat (mesmo percurso reverso, custo constante)
+LATEST_MESSAGE_SCRIPT = """
+const messageSelectors = arguments[0];
+const textSelectors = arguments[1];
+const containerSelector = arguments[2];
+""" + EXTRACT_MESSAGE_JS + REVERSE_WALK_JS + """
+for (const sel of messageSelectors) {
+    const node = findLast(sel);
+    if (node) { return {selector: sel, message: extract(node)}; }
+}
+return null;
+"""
+
+# Rola o chat até o topo para o Telegram Web carregar o histórico anterior e
+# retorna a mensagem mais antiga carregada (backfill após reinício). O elemento
+# rolável é o ancestral mais próximo da primeira mensagem com barra de rolagem.
+SCROLL_BACK_SCRIPT = """
+const messageSelectors = arguments[0];
+const textSelectors = arguments[1];
+const containerSelector = arguments[2];
+""" + EXTRACT_MESSAGE_JS + """
+const chatRoot = (containerSelector && document.querySelector(containerSelector)) || document.body;
+for (const sel of messageSelectors) {
+    const oldest = chatRoot.querySelector(sel);
+    if (!oldest) { continue; }
+    let scroller = oldest.parentElement;
+    while (scroller && scroller !== document.body && scroller.scrollHeight <= scroller.clientHeight) {
+        scroller = scroller.parentElement;
+    }
+    if (scroller) { scroller.scrollTop = 0; window.__betScroller = scroller; }
+    return extract(oldest);
+}
+return null;
+"""
+
+# Volta o chat para a mensagem mais recente depois do backfill
+SCROLL_BOTTOM_SCRIPT = """
+const scroller = window.__betScroller;
+if (scroller) { scroller.scrollTop = scroller.scrollHeight; }
+"""
+
+# Quantidade de elementos na página (verificação periódica do tamanho do DOM)
+DOM_SIZE_SCRIPT = "return document.getElementsByTagName('*').length;"
+
+# Instala um MutationObserver no container do chat. Cada mensagem nova é
+# extraída no próprio navegador e guardada em uma fila. As abas dos grupos
+# (mesma origem) anunciam por um BroadcastChannel quando a fila fica pendente
+# ou é esvaziada, e um long-poll pendente (PUSH_WAIT_SCRIPT) em qualquer aba
+# é resolvido assim que algum grupo aguardado tiver mensagens.
+PUSH_INSTALL_SCRIPT = """
+const containerSelector = arguments[0];
+const messageSelectors = arguments[1];
+const textSelectors = arguments[2];
+const groupId = arguments[3];
+""" + EXTRACT_MESSAGE_JS + """
+const container = document.querySelector(containerSelector);
+if (!container) { return false; }
+
+if (window.__betWatcher) {
+    if (window.__betWatcher.observer) { window.__betWatcher.observer.disconnect(); }
+    if (window.__betWatcher.channel) { window.__betWatcher.channel.close(); }
+}
+
+const watcher = {id: groupId, queue: [], pending: new Set(), waiter: null, observer: null,
+                 channel: new BroadcastChannel('__betWatcher')};
+watcher.announce = (hello) => {
+    watcher.channel.postMessage({id: watcher.id, pending: watcher.queue.length > 0, hello: !!hello});
+};
+const deliver = () => {
+    if (watcher.waiter) { watcher.waiter(); }
+};
+
+watcher.channel.onmessage = (event) => {
+    const data = event.data;
+    if (data.pending) { watcher.pending.add(data.id); } else { watcher.pending.delete(data.id); }
+    // Aba recém-instalada: reenvia o estado da fila para ela
+    if (data.hello && watcher.queue.length) { watcher.announce(); }
+    deliver();
+};
+
+watcher.observer = new MutationObserver((mutations) => {
+    const wasEmpty = watcher.queue.length === 0;
+    for (const mutation of mutations) {
+        for (const node of mutation.addedNodes) {
+            if (node.nodeType !== Node.ELEMENT_NODE) { continue; }
+            const found = [];
+            for (const sel of messageSelectors) {
+                if (node.matches(sel)) { found.push(node); break; }
+                const inner = node.querySelectorAll(sel);
+                if (inner.length) { found.push(...inner); break; }
+            }
+            for (const message of found) {
+                const data = extract(message);
+                if (data.text) { watcher.queue.push(data); }
+            }
+        }
+    }
+    // Evita crescimento sem limite se ninguém consumir a fila
+    if (watcher.queue.length > 500) { watcher.queue.splice(0, watcher.queue.length - 500); }
+    if (wasEmpty && watcher.queue.length) { watcher.announce(); }
+    deliver();
+});
+watcher.observer.observe(container, {childList: true, subtree: true});
+window.__betWatcher = watcher;
+watcher.announce(true);
+return true;
+"""
+
+# Long-poll bloqueante: retorna assim que a fila desta aba ou a de algum dos
+# grupos aguardados (arguments[1]) tiver mensagens, com {messages: fila desta
+# aba, ready: grupos de outras abas com mensagens}; listas vazias no timeout
+# ou null se o observer não existir mais (ex.: página recarregada)
+PUSH_WAIT_SCRIPT = """
+const timeoutMs = arguments[0];
+const groupIds = arguments[1];
+const done = arguments[arguments.length - 1];
+const watcher = window.__betWatcher;
+if (!watcher) { done(null); return; }
+const collect = () => {
+    const ready = groupIds.filter((id) => id !== watcher.id && watcher.pending.has(id));
+    if (!watcher.queue.length && !ready.length) { return null; }
+    const messages = watcher.queue.splice(0);
+    if (messages.length) { watcher.announce(); }
+    return {messages, ready};
+};
+const result = collect();
+if (result) { done(result); return; }
+const timer = setTimeout(() => { watcher.waiter = null; done({messages: [], ready: []}); }, timeoutMs);
+watcher.waiter = () => {
+    const result = collect();
+    if (result) { watcher.waiter = null; clearTimeout(timer); done(result); }
+};
+"""
+
+class GroupTab:
+    """Aba do navegador dedicada a um grupo monitorado"""
+    
+    def __init__(self, url: str):
+        self.url = url
+        self.handle = None
+        self.chat_container_selector = None
+        self.use_push = False
+        self.loaded_at = None
+        self.checked_at = None
+        self.drained_at = None
+        self.pending = False
+
+class TelegramWatcher(MessageSource):
+    """Classe para monitorar mensagens no Telegram Web (um navegador, uma aba por grupo)"""
     
-    def __init__(self):
+    def __init__(self, group_urls: Optional[List[str]] = None, cursor_file: str = None):
+        super().__init__(cursor_file=cursor_file)
         self.browser_manager = BrowserManager("telegram_profile")
         self.session_manager = SessionManager(Config.TELEGRAM_SESSION_FILE)
-        self.last_message_id = None
-        self.last_message_text = ""
+        self.selector_cache = SelectorCache(Config.SELECTOR_CACHE_FILE)
         self.is_logged_in = False
+        self.chat_container_selector = None
+        self.groups = [GroupTab(url) for url in (group_urls or Config.TELEGRAM_GROUP_URLS)]
+        self.current_tab = None
+        self.scheduler = AdaptivePollScheduler()
+        self.message_selector_missing = False
     
     def login(self) -> bool:
         """Realiza login no Telegram Web"""
@@ -98,7 +396,7 @@ class TelegramWatcher:
                         
                         password_confirm = waiter.wait_for_clickable(By.CSS_SELECTOR, 'button[type="submit"], .btn-primary', 5)
                         password_confirm.click()
-                        
+                
                 except TimeoutException:
                     logger.info("Senha 2FA não necessária")
                 
@@ -114,12 +412,12 @@ class TelegramWatcher:
                     logger.error("Falha no login - interface não carregou")
                     take_screenshot(driver, "login_failed.png")
                     return False
-                    
+            
             except TimeoutException as e:
                 logger.error(f"Timeout durante login: {e}")
                 take_screenshot(driver, "login_timeout.png")
                 return False
-                
+        
         except Exception as e:
             logger.error(f"Erro durante login: {e}")
             take_screenshot(self.browser_manager.get_driver(), "login_error.png")
@@ -139,49 +437,43 @@ class TelegramWatcher:
                 '.chatlist-container'
             ]
             
-            for selector in login_indicators:
-                try:
-                    elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                    if elements:
-                        logger.info(f"Login confirmado - encontrado elemento: {selector}")
-                        return True
-                except:
-                    continue
-            
-            # Verificar se ainda está na página de login
+            # Indicadores de que ainda está na página de login
             login_elements = [
                 'input[type="tel"]',
                 '.login-phone',
                 '.auth-form'
             ]
             
-            for selector in login_elements:
-                try:
-                    elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                    if elements:
-                        logger.info(f"Ainda na página de login - encontrado: {selector}")
-                        return False
-                except:
-                    continue
+            # Uma única verificação na página; indicadores de sucesso têm prioridade
+            selector, _ = ElementWaiter(driver).wait_for_any(login_indicators + login_elements, 0)
             
-            return False
+            if selector in login_indicators:
+                logger.info(f"Login confirmado - encontrado: {selector}")
+                return True
             
+            if selector in login_elements:
+                logger.info(f"Ainda na página de login - encontrado: {selector}")
+                return False
+            
+            return False
+        
         except Exception as e:
             logger.error(f"Erro ao verificar status de login: {e}")
             return False
     
-    def navigate_to_group(self) -> bool:
-        """Navega para o grupo de apostas"""
+    def navigate_to_group(self, group_url: Optional[str] = None) -> bool:
+        """Navega para o grupo de apostas na aba atual"""
         try:
             if not self.is_logged_in:
                 logger.error("Não está logado no Telegram")
                 return False
             
             driver = self.browser_manager.get_driver()
+            group_url = group_url or self.group
             
             # Navegar para o grupo
-            logger.info(f"Navegando para grupo: {Config.TELEGRAM_GROUP_URL}")
-            driver.get(Config.TELEGRAM_GROUP_URL)
+            logger.info(f"Navegando para grupo: {group_url}")
+            driver.get(group_url)
             
             # Aguardar carregamento
             time.sleep(5)
@@ -202,6 +494,7 @@ class TelegramWatcher:
                     try:
                         waiter.wait_for_element(By.CSS_SELECTOR, selector, 10)
                         logger.info(f"Grupo carregado - encontrado: {selector}")
+                        self.chat_container_selector = selector
                         return True
                     except TimeoutException:
                         continue
@@ -209,174 +502,371 @@ class TelegramWatcher:
                 logger.error("Não foi possível confirmar carregamento do grupo")
                 take_screenshot(driver, "group_navigation_failed.png")
                 return False
-                
+            
             except Exception as e:
                 logger.error(f"Erro ao verificar carregamento do grupo: {e}")
                 return False
-                
+        
         except Exception as e:
             logger.error(f"Erro ao navegar para grupo: {e}")
             return False
     
+    @tracer.traced('telegram.get_latest_message')
     def get_latest_message(self) -> Optional[Dict]:
-        """Obtém a última mensagem do grupo"""
+        """Obtém a última mensagem do grupo (percurso reverso do DOM, custo constante)"""
         try:
             driver = self.browser_manager.get_driver()
-            waiter = ElementWaiter(driver)
+            result = driver.execute_script(
+                LATEST_MESSAGE_SCRIPT,
+                self.selector_cache.ordered(TELEGRAM_SITE, 'message_list', MESSAGE_SELECTORS),
+                self.selector_cache.ordered(TELEGRAM_SITE, 'message_text', TEXT_SELECTORS),
+                self.chat_container_selector
+            )
             
-            # Seletores possíveis para mensagens
-            message_selectors = [
-                '.message',
-                '.im_message_text',
-                '[data-testid="Message"]',
-                '.chat-message',
-                '.message-content'
-            ]
-            
-            messages = []
-            for selector in message_selectors:
-                try:
-                    elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                    if elements:
-                        messages = elements
-                        logger.debug(f"Encontradas {len(messages)} mensagens com seletor: {selector}")
-                        break
-                except:
-                    continue
-            
-            if not messages:
+            if not result:
                 logger.warning("Nenhuma mensagem encontrada")
                 return None
             
-            # Pegar a última mensagem
-            last_message = messages[-1]
+            self.selector_cache.record(TELEGRAM_SITE, 'message_list', result['selector'])
+            raw = result['message']
+            if raw.get('sel'):
+                self.selector_cache.record(TELEGRAM_SITE, 'message_text', raw['sel'])
             
-            try:
-                # Tentar extrair texto da mensagem
-                message_text = ""
-                text_selectors = [
-                    '.message-text',
-                    '.text-content',
-                    '.im_message_text',
-                    'strong',
-                    '.message-content'
-                ]
-                
-                for text_selector in text_selectors:
-                    try:
-                        text_element = last_message.find_element(By.CSS_SELECTOR, text_selector)
-                        message_text = text_element.text.strip()
-                        if message_text:
-                            break
-                    except:
-                        continue
-                
-                if not message_text:
-                    message_text = last_message.text.strip()
-                
-                # Tentar extrair link
-                link = ""
-                try:
-                    link_element = last_message.find_element(By.CSS_SELECTOR, 'a[href]')
-                    link = link_element.get_attribute('href')
-                except:
-                    pass
-                
-                # Criar ID único para a mensagem
-                message_id = hash(message_text + str(datetime.now().timestamp()))
-                
-                message_data = {
-                    'id': message_id,
-                    'text': message_text,
-                    'link': link,
-                    'timestamp': datetime.now().isoformat()
-                }
-                
-                logger.debug(f"Mensagem extraída: {message_data}")
-                return message_data
-                
-            except Exception as e:
-                logger.error(f"Erro ao extrair dados da mensagem: {e}")
-                return None
-                
+            message_data = self._build_message_data(raw['text'], raw['link'], raw.get('mid'), raw.get('ts'))
+            logger.debug(f"Mensagem extraída: {message_data}")
+            return message_data
+        
         except Exception as e:
             logger.error(f"Erro ao obter última mensagem: {e}")
             return None
     
-    def check_for_new_message(self) -> Optional[Dict]:
-        """Verifica se há nova mensagem e retorna informações de aposta"""
+    @tracer.traced('telegram.get_new_messages')
+    def get_new_messages(self) -> List[Dict]:
+        """
+        Obtém todas as mensagens mais novas que o cursor em um único round trip.
+        Se o percurso reverso for truncado pelo orçamento de nós, o chat é lido
+        por inteiro antes de avançar o cursor (nenhuma mensagem é pulada).
+        """
         try:
-            current_message = self.get_latest_message()
-            
-            if not current_message:
-                return None
+            driver = self.browser_manager.get_driver()
+            args = (
+                self.selector_cache.ordered(TELEGRAM_SITE, 'message_list', MESSAGE_SELECTORS),
+                self.selector_cache.ordered(TELEGRAM_SITE, 'message_text', TEXT_SELECTORS),
+                self.last_message_mid,
+                self.chat_container_selector
+            )
+            result = driver.execute_script(EXTRACT_NEW_MESSAGES_SCRIPT, *args)
+            if result and result.get('truncated'):
+                logger.warning(f"Percurso reverso truncado em {self.group} (cursor {self.last_message_mid}), lendo o chat inteiro")
+                with tracer.span('telegram.full_scan'):
+                    result = driver.execute_script(FULL_SCAN_SCRIPT, *args)
             
-            # Verificar se é uma nova mensagem
-            if (self.last_message_id != current_message['id'] and 
-                self.last_message_text != current_message['text']):
-                
-                logger.info("Nova mensagem detectada!")
-                logger.info(f"Texto: {current_message['text'][:100]}...")
-                
-                # Atualizar última mensagem
-                self.last_message_id = current_message['id']
-                self.last_message_text = current_message['text']
-                
-                # Extrair informações de aposta
-                bet_info = MessageParser.extract_bet_info(current_message['text'])
-                
-                if bet_info:
-                    # Adicionar link se encontrado na mensagem
-                    if current_message['link']:
-                        bet_info['link'] = current_message['link']
-                    
-                    bet_info['message_data'] = current_message
-                    logger.info(f"Informações de aposta extraídas: {bet_info}")
-                    return bet_info
-                else:
-                    logger.info("Mensagem não contém informações de aposta válidas")
+            if not result or not result['selector']:
+                if not self.message_selector_missing:
+                    logger.error(f"Nenhum seletor de mensagens encontrou mensagens em {self.group} - layout do site mudou?")
+                    self.message_selector_missing = True
+                return []
             
+            self.message_selector_missing = False
+            self.selector_cache.record(TELEGRAM_SITE, 'message_list', result['selector'])
+            messages = self._accept_raw_messages(result['messages'])
+            if messages:
+                logger.debug(f"{len(messages)} mensagens novas desde o cursor")
+            return messages
+        
+        except Exception as e:
+            logger.error(f"Erro ao obter novas mensagens: {e}")
+            return []
+    
+    def _accept_raw_messages(self, raw_messages: List[Dict]) -> List[Dict]:
+        """Registra no cache os seletores de texto usados e avança o cursor"""
+        for raw in raw_messages:
+            if raw.get('sel'):
+                self.selector_cache.record(TELEGRAM_SITE, 'message_text', raw['sel'])
+        return super()._accept_raw_messages(raw_messages)
+    
+    def _install_message_observer(self) -> bool:
+        """Instala o MutationObserver no container do chat (modo push)"""
+        if not self.chat_container_selector:
+            return False
+        
+        try:
+            driver = self.browser_manager.get_driver()
+            installed = driver.execute_script(
+                PUSH_INSTALL_SCRIPT,
+                self.chat_container_selector,
+                self.selector_cache.ordered(TELEGRAM_SITE, 'message_list', MESSAGE_SELECTORS),
+                self.selector_cache.ordered(TELEGRAM_SITE, 'message_text', TEXT_SELECTORS),
+                self.group
+            )
+            if installed:
+                logger.info(f"Observer de mensagens instalado em: {self.chat_container_selector}")
+            else:
+                logger.warning(f"Container do chat não encontrado: {self.chat_container_selector}")
+            return bool(installed)
+        except Exception as e:
+            logger.error(f"Erro ao instalar observer de mensagens: {e}")
+            return False
+    
+    def wait_for_pushed_messages(self, timeout: float, group_ids: List[str] = ()) -> Optional[Tuple[List[Dict], List[str]]]:
+        """
+        Bloqueia até o observer desta aba ou o de algum dos group_ids (outras
+        abas) ter mensagens, ou o timeout expirar. Retorna as mensagens desta aba
+        e os grupos das outras abas com mensagens pendentes, ou None se o
+        observer não estiver mais instalado na página.
+        """
+        driver = self.browser_manager.get_driver()
+        driver.set_script_timeout(timeout + 5)
+        result = driver.execute_async_script(PUSH_WAIT_SCRIPT, timeout * 1000, list(group_ids))
+        
+        if result is None:
             return None
+        
+        return self._accept_raw_messages(result['messages']), result['ready']
+    
+    def _activate(self, tab: GroupTab):
+        """Muda para a aba do grupo; cursor e container passam a ser os do grupo"""
+        if self.current_tab is not tab:
+            self.browser_manager.get_driver().switch_to.window(tab.handle)
+            self.current_tab = tab
+        self.group = tab.url
+        self.chat_container_selector = tab.chat_container_selector
+    
+    def open_group_tabs(self) -> bool:
+        """Abre cada grupo em uma aba do mesmo navegador (sessão e processo compartilhados)"""
+        driver = self.browser_manager.get_driver()
+        opened = []
+        
+        for tab in self.groups:
+            if opened:
+                driver.switch_to.new_window('tab')
+            tab.handle = driver.current_window_handle
+            self._activate(tab)
             
+            if not self.navigate_to_group(tab.url):
+                logger.error(f"Grupo ignorado, falha ao carregar: {tab.url}")
+                if opened:
+                    driver.close()
+                    self.current_tab = None
+                    self._activate(opened[-1])
+                continue
+            
+            # Modo push com fallback para polling se o observer não puder ser instalado
+            tab.chat_container_selector = self.chat_container_selector
+            tab.use_push = Config.ENABLE_PUSH_MODE and self._install_message_observer()
+            tab.loaded_at = tab.checked_at = tab.drained_at = clock.time()
+            opened.append(tab)
+        
+        self.groups = opened
+        return bool(opened)
+    
+    def backfill_group(self, tab: GroupTab, callback_function) -> int:
+        """
+        Recupera as mensagens enviadas enquanto o processo estava parado: rola o
+        chat para trás até alcançar o cursor salvo (ou o limite de idade/rolagens)
+        e lê o intervalo inteiro em um único lote pelo cursor. Sem cursor salvo
+        (primeira execução) nada é feito e o monitoramento parte da última mensagem.
+        """
+        self._activate(tab)
+        cursor = self.last_message_mid
+        if cursor is None:
+            return 0
+        
+        driver = self.browser_manager.get_driver()
+        cutoff = clock.time() - Config.BACKFILL_MAX_AGE_MINUTES * 60
+        message_selectors = self.selector_cache.ordered(TELEGRAM_SITE, 'message_list', MESSAGE_SELECTORS)
+        text_selectors = self.selector_cache.ordered(TELEGRAM_SITE, 'message_text', TEXT_SELECTORS)
+        previous_mid = None
+        
+        with tracer.span('telegram.backfill'):
+            for _ in range(Config.BACKFILL_MAX_SCROLLS):
+                oldest = driver.execute_script(SCROLL_BACK_SCRIPT, message_selectors, text_selectors, self.chat_container_selector)
+                if not oldest or oldest.get('mid') is None or oldest['mid'] <= cursor:
+                    break
+                if (oldest.get('ts') and oldest['ts'] < cutoff) or oldest['mid'] == previous_mid:
+                    # Histórico mais antigo não seria apostado ou não há mais o que carregar
+                    break
+                previous_mid = oldest['mid']
+                clock.sleep(Config.BACKFILL_SCROLL_DELAY_SECONDS)
+            else:
+                logger.warning(f"Backfill de {tab.url} parou em {Config.BACKFILL_MAX_SCROLLS} rolagens sem alcançar o cursor {cursor}")
+            
+            messages = self.get_new_messages()
+            driver.execute_script(SCROLL_BOTTOM_SCRIPT)
+        
+        logger.info(f"Backfill de {tab.url} desde a mensagem {cursor}: {len(messages)} mensagens")
+        return self.process_backlog(messages, callback_function)
+    
+    def _poll_group(self, tab: GroupTab, wait_seconds: float, callback_function, wait_for: List[GroupTab] = ()):
+        """
+        Coleta as mensagens novas de um grupo (fila do observer ou polling
+        agendado). Em modo push a espera também termina quando alguma aba de
+        wait_for tiver mensagens; essas abas ficam marcadas como pendentes.
+        """
+        self._activate(tab)
+        
+        if tab.use_push:
+            result = self.wait_for_pushed_messages(wait_seconds, [other.url for other in wait_for])
+            if result is None:
+                # Observer perdido (ex.: página recarregada), tentar reinstalar
+                logger.warning(f"Observer de mensagens perdido em {tab.url}, reinstalando...")
+                if not self._install_message_observer():
+                    logger.warning(f"Voltando ao polling em {tab.url}")
+                    tab.use_push = False
+                return
+            messages, ready = result
+            tab.pending = False
+            tab.drained_at = clock.time()
+            for other in wait_for:
+                other.pending = other.pending or other.url in ready
+            self.scheduler.record_success(tab.url)
+        else:
+            messages = self.get_new_messages()
+            self.scheduler.record_poll(tab.url, messages)
+        
+        for message_data in messages:
+            bet_info = self._process_message(message_data)
+            if bet_info:
+                self._dispatch(bet_info, callback_function)
+    
+    def compact_group_tab(self, tab: GroupTab, callback_function, force: bool = False) -> bool:
+        """
+        Recarrega o chat quando o DOM passa de DOM_MAX_NODES elementos ou a aba tem
+        mais de CHAT_RELOAD_HOURS horas, mantendo memória e custo por verificação
+        estáveis em execuções longas. O cursor do grupo é preservado: mensagens
+        chegadas durante o recarregamento são lidas em seguida.
+        """
+        now = clock.time()
+        if not force and now - tab.checked_at < Config.DOM_CHECK_INTERVAL_SECONDS:
+            return False
+        tab.checked_at = now
+        
+        self._activate(tab)
+        driver = self.browser_manager.get_driver()
+        dom_nodes = driver.execute_script(DOM_SIZE_SCRIPT)
+        age_hours = (now - tab.loaded_at) / 3600
+        if not force and dom_nodes <= Config.DOM_MAX_NODES and age_hours < Config.CHAT_RELOAD_HOURS:
+            logger.debug(f"DOM de {tab.url}: {dom_nodes} elementos, aba com {age_hours:.1f}h")
+            return False
+        
+        logger.info(f"Recarregando {tab.url} ({dom_nodes} elementos no DOM, aba com {age_hours:.1f}h)")
+        driver.refresh()
+        if not self.navigate_to_group(tab.url):
+            raise RuntimeError(f"Falha ao recarregar o grupo {tab.url}")
+        
+        tab.chat_container_selector = self.chat_container_selector
+        tab.loaded_at = tab.checked_at = clock.time()
+        if tab.use_push:
+            tab.use_push = self._install_message_observer()
+        
+        for message_data in self.get_new_messages():
+            bet_info = self._process_message(message_data)
+            if bet_info:
+                self._dispatch(bet_info, callback_function)
+        
+        logger.info(f"Chat recarregado: {driver.execute_script(DOM_SIZE_SCRIPT)} elementos no DOM")
+        return True
+    
+    def _guarded(self, tab: GroupTab, func, *args) -> bool:
+        """
+        Executa uma operação de uma aba; em caso de erro apenas essa aba entra em
+        backoff (próxima verificação adiada pelo agendador) e as demais seguem.
+        """
+        try:
+            func(*args)
+            return True
         except Exception as e:
-            logger.error(f"Erro ao verificar nova mensagem: {e}")
-            return None
+            delay = self.scheduler.record_error(tab.url)
+            logger.error(f"Erro durante monitoramento ({tab.url}), nova tentativa em {delay:.0f}s: {e}")
+            if tab.use_push:
+                try:
+                    self._activate(tab)
+                    tab.use_push = self._install_message_observer()
+                except Exception as install_error:
+                    logger.error(f"Erro ao reinstalar observer em {tab.url}: {install_error}")
+            return False
+    
+    def monitor_round(self, wait_seconds: float, callback_function):
+        """
+        Uma rodada do monitoramento: uma única espera, na aba atual, por mensagens
+        de qualquer aba em modo push (limitada pela próxima verificação agendada);
+        depois só as abas com mensagens pendentes são lidas. Abas em polling são
+        verificadas quando o agendador indicar e abas em backoff por erro são
+        puladas até a próxima verificação. Sem nenhuma aba push para aguardar,
+        dorme até a próxima verificação vencer.
+        """
+        push_due = set(self.scheduler.due_groups([tab.url for tab in self.groups if tab.use_push]))
+        push_tabs = [tab for tab in self.groups if tab.use_push and tab.url in push_due]
+        polled = {tab.url: tab for tab in self.groups if not tab.use_push}
+        
+        waited = False
+        if push_tabs:
+            waiter = self.current_tab if self.current_tab in push_tabs else push_tabs[0]
+            others = [tab for tab in push_tabs if tab is not waiter]
+            scheduled = [tab.url for tab in self.groups if tab.url not in push_due]
+            if scheduled:
+                wait_seconds = min(wait_seconds, self.scheduler.time_until_next(scheduled))
+            waited = self._guarded(waiter, self._poll_group, waiter, wait_seconds, callback_function, others)
+            
+            # Abas sem aviso também são lidas a cada PUSH_WAIT_TIMEOUT_SECONDS para
+            # detectar observers perdidos (página recarregada não avisa as demais)
+            now = clock.time()
+            for tab in others:
+                if tab.pending or now - tab.drained_at >= Config.PUSH_WAIT_TIMEOUT_SECONDS:
+                    self._guarded(tab, self._poll_group, tab, 0, callback_function)
+        
+        for url in self.scheduler.due_groups(list(polled)):
+            self._guarded(polled[url], self._poll_group, polled[url], 0, callback_function)
+        
+        for tab in self.groups:
+            self._guarded(tab, self.compact_group_tab, tab, callback_function)
+        self.save_cursors()
+        
+        if not waited and self.groups:
+            clock.sleep(self.scheduler.time_until_next([tab.url for tab in self.groups]))
     
     def start_monitoring(self, callback_function):
-        """Inicia monitoramento contínuo de mensagens"""
+        """Inicia monitoramento contínuo de mensagens de todos os grupos"""
         logger.info("Iniciando monitoramento do Telegram...")
         
         if not self.login():
             logger.error("Falha no login, não é possível monitorar")
             return False
         
-        if not self.navigate_to_group():
+        if not self.open_group_tabs():
             logger.error("Falha ao navegar para grupo, não é possível monitorar")
             return False
         
-        logger.info(f"Monitoramento iniciado - verificando a cada {Config.CHECK_INTERVAL_SECONDS}s")
+        # Mensagens perdidas durante a parada (observer já instalado: o que chegar
+        # durante o backfill fica na fila e é filtrado pelo cursor)
+        for tab in self.groups:
+            try:
+                self.backfill_group(tab, callback_function)
+            except Exception as e:
+                logger.error(f"Erro no backfill de {tab.url}: {e}")
+        
+        # Uma espera por rodada para todas as abas em modo push (a primeira com
+        # mensagens acorda a espera); abas em polling são verificadas quando o
+        # agendador adaptativo indicar.
+        push_groups = [tab for tab in self.groups if tab.use_push]
+        logger.info(
+            f"Monitoramento iniciado - {len(self.groups)} grupo(s), {len(push_groups)} em modo push (MutationObserver), "
+            f"demais em polling adaptativo ({self.scheduler.min_interval}s a {self.scheduler.max_interval}s)"
+        )
         
         while True:
             try:
-                bet_info = self.check_for_new_message()
-                
-                if bet_info:
-                    logger.info("Nova aposta detectada, executando callback...")
-                    try:
-                        callback_function(bet_info)
-                    except Exception as e:
-                        logger.error(f"Erro no callback: {e}")
-                
-                time.sleep(Config.CHECK_INTERVAL_SECONDS)
-                
+                self.monitor_round(Config.PUSH_WAIT_TIMEOUT_SECONDS, callback_function)
             except KeyboardInterrupt:
                 logger.info("Monitoramento interrompido pelo usuário")
                 break
             except Exception as e:
                 logger.error(f"Erro durante monitoramento: {e}")
-                time.sleep(Config.CHECK_INTERVAL_SECONDS * 2)  # Aguardar mais em caso de erro
+                clock.sleep(self.scheduler.min_interval)
     
     def close(self):
         """Fecha o watcher e limpa recursos"""
+        if self.scheduler.get_metrics():
+            logger.info(f"Polling adaptativo por grupo: {self.scheduler.get_metrics()}")
         self.browser_manager.close_driver()
         logger.info("Telegram Watcher fechado")
@@ -0,0 +1,226 @@
+
+import os
+import json
+import time
+import uuid
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import Dict, Optional
+from loguru import logger
+
+from config import Config
+
+# Spans acumuladas que acordam a exportação antes do intervalo
+FLUSH_BATCH_SIZE = 50
+
+class Tracer:
+    """
+    Instrumentação de latência por etapa, da detecção da mensagem à confirmação
+    da aposta. record() só acumula em memória; uma thread em segundo plano
+    exporta as spans a cada flush_interval segundos (ou ao acumular
+    FLUSH_BATCH_SIZE) e rotaciona o JSONL ao passar de max_mb, mantendo no
+    máximo max_files arquivos (traces.jsonl, traces.jsonl.1, ...).
+    """
+    
+    def __init__(self, export_file: str, max_samples: int = 10000, enabled: bool = True,
+                 flush_interval: float = None, max_mb: float = None, max_files: int = None):
+        self.export_file = Path(export_file)
+        self.max_samples = max_samples
+        self.enabled = enabled
+        self.flush_interval = Config.TRACE_FLUSH_INTERVAL_SECONDS if flush_interval is None else flush_interval
+        self.max_bytes = int((Config.TRACE_MAX_MB if max_mb is None else max_mb) * 1024 * 1024)
+        self.max_files = max(1, Config.TRACE_MAX_FILES if max_files is None else max_files)
+        self._samples = defaultdict(lambda: deque(maxlen=self.max_samples))
+        self._counts = defaultdict(int)
+        self._failures = defaultdict(int)
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    @staticmethod
+    def new_trace_id() -> str:
+        """Gera ID de trace para um sinal"""
+        return uuid.uuid4().hex[:12]
+    
+    def current_trace_id(self) -> Optional[str]:
+        """Trace ativo na thread atual"""
+        return getattr(self._local, 'trace_id', None)
+    
+    def set_trace_id(self, trace_id: Optional[str]):
+        """Define o trace ativo na thread atual"""
+        self._local.trace_id = trace_id
+    
+    @contextmanager
+    def trace(self, trace_id: Optional[str]):
+        """Associa as spans executadas no bloco ao trace informado"""
+        previous = self.current_trace_id()
+        self.set_trace_id(trace_id)
+        try:
+            yield
+        finally:
+            self.set_trace_id(previous)
+    
+    @contextmanager
+    def span(self, stage: str):
+        """Mede a duração do bloco como uma etapa"""
+        start = time.perf_counter()
+        ok = True
+        try:
+            yield
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            self.record(stage, time.perf_counter() - start, ok=ok)
+    
+    def traced(self, stage: str):
+        """Decorador que mede cada chamada da função como uma etapa (retorno False conta como falha)"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                ok = False
+                try:
+                    result = func(*args, **kwargs)
+                    ok = result is not False
+                    return result
+                finally:
+                    self.record(stage, time.perf_counter() - start, ok=ok)
+            return wrapper
+        return decorator
+    
+    def record(self, stage: str, duration: float, trace_id: Optional[str] = None, ok: bool = True):
+        """Registra duração (segundos) de uma etapa"""
+        if not self.enabled:
+            return
+        
+        if trace_id is None:
+            trace_id = self.current_trace_id()
+        
+        with self._lock:
+            self._samples[stage].append(duration)
+            self._counts[stage] += 1
+            if not ok:
+                self._failures[stage] += 1
+            self._buffer.append({
+                'ts': round(time.time(), 3),
+                'trace_id': trace_id,
+                'stage': stage,
+                'duration_ms': round(duration * 1000, 3),
+                'ok': ok,
+            })
+            should_wake = len(self._buffer) >= FLUSH_BATCH_SIZE
+        
+        self._ensure_started()
+        if should_wake:
+            self._wake.set()
+    
+    def _ensure_started(self):
+        """Inicia a thread de exportação no primeiro registro"""
+        if self._thread:
+            return
+        with self._lock:
+            if self._thread:
+                return
+            self._thread = threading.Thread(target=self._flusher_loop, name="trace-flusher", daemon=True)
+            self._thread.start()
+    
+    def _flusher_loop(self):
+        """Exporta as spans periodicamente ou quando o lote enche"""
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+    
+    def flush(self):
+        """Exporta spans pendentes para o arquivo JSONL"""
+        with self._write_lock:
+            with self._lock:
+                buffer, self._buffer = self._buffer, []
+        
+            if not buffer:
+                return
+        
+            try:
+                with open(self.export_file, 'a', encoding='utf-8') as f:
+                    f.writelines(json.dumps(entry) + '\n' for entry in buffer)
+                if self.export_file.stat().st_size > self.max_bytes:
+                    self._rotate()
+            except Exception as e:
+                logger.error(f"Erro ao exportar traces: {e}")
+    
+    def _rotated_path(self, index: int) -> Path:
+        """traces.jsonl (0), traces.jsonl.1, traces.jsonl.2..."""
+        return self.export_file if index == 0 else self.export_file.with_name(f"{self.export_file.name}.{index}")
+    
+    def _rotate(self):
+        """Desloca os arquivos exportados; o mais antigo acima de max_files é descartado"""
+        for index in range(self.max_files - 1, 0, -1):
+            source = self._rotated_path(index - 1)
+            if source.exists():
+                os.replace(source, self._rotated_path(index))
+        self.export_file.unlink(missing_ok=True)
+    
+    def close(self):
+        """Encerra a thread de exportação e grava as spans pendentes"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+        self.flush()
+    
+    @staticmethod
+    def _percentile(sorted_values, pct: float) -> float:
+        """Percentil por ranking mais próximo"""
+        index = max(0, int(round(pct / 100 * len(sorted_values))) - 1)
+        return sorted_values[min(index, len(sorted_values) - 1)]
+    
+    def stage_stats(self, stage: str) -> Optional[Dict]:
+        """Contagem e percentis (ms) de uma etapa"""
+        with self._lock:
+            values = sorted(self._samples.get(stage, ()))
+            count = self._counts.get(stage, 0)
+            failures = self._failures.get(stage, 0)
+        
+        if not values:
+            return None
+        
+        return {
+            'count': count,
+            'failures': failures,
+            'p50_ms': round(self._percentile(values, 50) * 1000, 1),
+            'p95_ms': round(self._percentile(values, 95) * 1000, 1),
+            'p99_ms': round(self._percentile(values, 99) * 1000, 1),
+            'max_ms': round(values[-1] * 1000, 1),
+        }
+    
+    def summary(self) -> Dict[str, Dict]:
+        """Estatísticas de todas as etapas"""
+        with self._lock:
+            stages = sorted(self._samples)
+        return {stage: self.stage_stats(stage) for stage in stages}
+    
+    def log_summary(self):
+        """Exporta spans pendentes e registra resumo de latência no log"""
+        self.flush()
+        summary = self.summary()
+        if not summary:
+            return
+        
+        logger.info("Resumo de latência por etapa (p50 / p95 / p99 / max em ms):")
+        for stage, stats in summary.items():
+            logger.info(
+                f"  {stage:<32} n={stats['count']:<6} falhas={stats['failures']:<4} "
+                f"{stats['p50_ms']} / {stats['p95_ms']} / {stats['p99_ms']} / {stats['max_ms']}"
+            )
+
+# Instância global compartilhada por todos os componentes
+tracer = Tracer(Config.TRACE_FILE, enabled=Config.ENABLE_TRACING)
@@ -1,63 +1,141 @@
 
+import os
 import re
-import time
 import json
 import random
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
 from loguru import logger
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from artifacts import artifact_writer
+from clock import clock
+from config import Config
+from retry_policy import NO_DEADLINE, Deadline, RetryPolicy, RetryRule
+from tracing import tracer
+
+class CompiledMessageParser:
+    """
+    Parser de mensagens com padrões compilados uma única vez.
+    Todos os padrões rodam em tempo linear no tamanho da mensagem (sem
+    quantificadores aninhados que causem backtracking excessivo).
+    """
+    
+    # Padrões por campo, em ordem de precedência (o primeiro que casar vence).
+    # Equivalentes aos originais, reescritos para evitar backtracking:
+    # "\s*R?\$?\s*" virou "\s*(?:R\$?\s*|\$\s*)?", o valor em reais só
+    # começa no início de uma sequência de dígitos e o evento "Time A x Time B"
+    # só é tentado no início de cada trecho de letras/espaços.
+    FIELD_PATTERNS = (
+        ('valor', (
+            r'(?:valor|aposta|stake):\s*(?:R\$?\s*|\$\s*)?(?P<valor>\d+(?:[.,]\d{2})?)',
+            r'apostar\s+(?:R\$?\s*|\$\s*)?(?P<valor>\d+(?:[.,]\d{2})?)',
+            r'(?<!\d)(?P<valor>\d+(?:[.,]\d{2})?)\s*(?:reais|R\$)',
+        )),
+        ('link', (
+            r'(?P<link>https?://[^\s]+)',
+            r'(?:link|url):\s*(?P<link>https?://[^\s]+)',
+        )),
+        ('odds', (
+            r'(?:odd|cotação):\s*(?P<odds>\d+[.,]\d+)',
+            r'@(?P<odds>\d+[.,]\d+)',
+        )),
+        ('evento', (
+            r'(?:jogo|partida|evento):\s*(?P<evento>[^\n]+)',
+            r'(?<![A-Za-z\s])(?=[A-Za-z\s]+?\sx\s[A-Za-z\s])(?P<evento>[A-Za-z\s]+)',
+        )),
+    )
+    
+    # Sem estes campos a mensagem não é uma aposta
+    REQUIRED_FIELDS = ('valor', 'link')
+    
+    # Colunas do resultado de parse_batch
+    BATCH_COLUMNS = ('valor_numerico', 'link', 'odds', 'evento', 'parse_ok')
+    
+    def __init__(self, max_length: Optional[int] = None):
+        self.max_length = max_length
+        self._fields = tuple(
+            (field, tuple(re.compile(pattern, re.IGNORECASE) for pattern in patterns))
+            for field, patterns in self.FIELD_PATTERNS
+        )
+    
+    def parse(self, message_text: str) -> Optional[Dict]:
+        """
+        Extrai valor, link, odds e evento sem logging.
+        Retorna None assim que um campo obrigatório não for encontrado,
+        sem avaliar os campos opcionais.
+        """
+        if self.max_length and len(message_text) > self.max_length:
+            message_text = message_text[:self.max_length]
+        
+        extracted_info = {}
+        
+        for field, patterns in self._fields:
+            for pattern in patterns:
+                match = pattern.search(message_text)
+                if match:
+                    extracted_info[field] = match.group(field).strip()
+                    break
+            else:
+                if field in self.REQUIRED_FIELDS:
+                    return None
+        
+        # Normalizar valor (trocar vírgula por ponto)
+        extracted_info['valor_numerico'] = float(extracted_info['valor'].replace(',', '.'))
+        return extracted_info
+    
+    def parse_batch(self, texts) -> pd.DataFrame:
+        """
+        Versão colunar de parse para arquivos de mensagens: uma linha por
+        mensagem, com os resultados do próprio parse (None vira parse_ok=False)
+        """
+        series = texts if isinstance(texts, pd.Series) else pd.Series(list(texts), dtype=object)
+        rows = []
+        for text in series.fillna('').astype(str):
+            extracted_info = self.parse(text)
+            if extracted_info is None:
+                rows.append((np.nan, None, np.nan, None, False))
+                continue
+            odds = extracted_info.get('odds')
+            rows.append((
+                extracted_info['valor_numerico'],
+                extracted_info['link'],
+                float(odds.replace(',', '.')) if odds else np.nan,
+                extracted_info.get('evento'),
+                True,
+            ))
+        return pd.DataFrame(rows, columns=list(self.BATCH_COLUMNS), index=series.index)
 
 class MessageParser:
     """Classe para extrair informações das mensagens do Telegram"""
     
+    # Instância compartilhada; padrões compilados na importação do módulo
+    compiled = CompiledMessageParser(Config.MAX_MESSAGE_LENGTH)
+    
     @staticmethod
+    @tracer.traced('parser.extract_bet_info')
     def extract_bet_info(message_text: str) -> Optional[Dict]:
         """
         Extrai informações de aposta da mensagem do Telegram
         Formato esperado: valor da aposta, link, detalhes
         """
         try:
-            # Padrões regex para diferentes formatos de mensagem
-            patterns = {
-                'valor': [
-                    r'(?:valor|aposta|stake):\s*R?\$?\s*(\d+(?:[.,]\d{2})?)',
-                    r'apostar\s+R?\$?\s*(\d+(?:[.,]\d{2})?)',
-                    r'(\d+(?:[.,]\d{2})?)\s*(?:reais|R\$)',
-                ],
-                'link': [
-                    r'(https?://[^\s]+)',
-                    r'(?:link|url):\s*(https?://[^\s]+)',
-                ],
-                'odds': [
-                    r'(?:odd|cotação):\s*(\d+[.,]\d+)',
-                    r'@(\d+[.,]\d+)',
-                ],
-                'evento': [
-                    r'(?:jogo|partida|evento):\s*([^\n]+)',
-                    r'([A-Za-z\s]+\s+x\s+[A-Za-z\s]+)',
-                ]
-            }
+            if len(message_text) > Config.MAX_MESSAGE_LENGTH:
+                logger.warning(f"Mensagem com {len(message_text)} caracteres truncada em {Config.MAX_MESSAGE_LENGTH}")
             
-            extracted_info = {}
-            
-            # Extrair cada tipo de informação
-            for info_type, pattern_list in patterns.items():
-                for pattern in pattern_list:
-                    match = re.search(pattern, message_text, re.IGNORECASE)
-                    if match:
-                        extracted_info[info_type] = match.group(1).strip()
-                        break
+            extracted_info = MessageParser.compiled.parse(message_text)
             
             # Validar se temos pelo menos valor e link
-            if 'valor' in extracted_info and 'link' in extracted_info:
-                # Normalizar valor (trocar vírgula por ponto)
-                valor_str = extracted_info['valor'].replace(',', '.')
-                extracted_info['valor_numerico'] = float(valor_str)
-                
+            if extracted_info:
                 logger.info(f"Informações extraídas: {extracted_info}")
                 return extracted_info
             else:
@@ -67,6 +145,32 @@ class MessageParser:
         except Exception as e:
             logger.error(f"Erro ao extrair informações da mensagem: {e}")
             return None
+    
+    @staticmethod
+    @tracer.traced('parser.extract_batch')
+    def extract_batch(texts) -> pd.DataFrame:
+        """
+        Extrai informações de aposta de muitas mensagens de uma vez (backtesting)
+        Retorna DataFrame com valor_numerico, link, odds, evento e parse_ok,
+        uma linha por mensagem e mesmos resultados de extract_bet_info
+        """
+        result = MessageParser.compiled.parse_batch(texts)
+        logger.info(f"Lote processado: {int(result['parse_ok'].sum())} apostas em {len(result)} mensagens")
+        return result
+
+def write_json_atomic(path: Path, data, **dump_kwargs):
+    """
+    Grava JSON por troca atômica, com arquivo temporário único no mesmo
+    diretório: gravadores concorrentes nunca escrevem no mesmo temporário.
+    """
+    with tempfile.NamedTemporaryFile('w', dir=path.parent, prefix=f"{path.name}.", suffix='.tmp',
+                                     delete=False) as f:
+        json.dump(data, f, **dump_kwargs)
+    try:
+        os.replace(f.name, path)
+    except Exception:
+        os.unlink(f.name)
+        raise
 
 class SessionManager:
     """Gerenciador de sessões para persistência de login"""
@@ -78,8 +182,7 @@ class SessionManager:
         """Salva cookies da sessão atual"""
         try:
             cookies = driver.get_cookies()
-            with open(self.session_file, 'w') as f:
-                json.dump(cookies, f, indent=2)
+            write_json_atomic(self.session_file, cookies, indent=2)
             logger.info(f"Sessão salva com {len(cookies)} cookies")
             return True
         except Exception as e:
@@ -127,73 +230,374 @@ class SessionManager:
             self.session_file.unlink()
             logger.info("Sessão limpa")
 
-class RetryHelper:
-    """Helper para operações com retry"""
+def build_message_id(source: str, text: str, mid: Optional[int] = None,
+                     sent_at: Optional[float] = None) -> str:
+    """
+    Gera ID determinístico para uma mensagem.
+    Usa o id do Telegram (data-mid) quando disponível; caso contrário,
+    o conteúdo e o horário de envio. Estável entre processos e reinícios.
+    Sem id nem horário, o ID só identifica o texto: não deve ser persistido
+    (ver has_stable_id), senão dicas idênticas futuras seriam descartadas.
+    """
+    if mid is not None:
+        key = f"{source}|mid:{mid}"
+    else:
+        key = f"{source}|{sent_at or ''}|{text.strip()}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+
+def has_stable_id(mid: Optional[int] = None, sent_at: Optional[float] = None) -> bool:
+    """O ID de build_message_id distingue envios (id do Telegram ou horário de envio)"""
+    return mid is not None or bool(sent_at)
+
+class SeenMessageIndex:
+    """Índice persistente de mensagens já processadas (LRU em memória + arquivo append-only)"""
     
-    @staticmethod
-    def retry_operation(func, max_retries: int = 3, delay: int = 5, *args, **kwargs):
-        """Executa operação com retry em caso de falha"""
-        for attempt in range(max_retries):
+    def __init__(self, index_file: str, max_entries: int = 10000):
+        self.index_file = Path(index_file)
+        self.max_entries = max_entries
+        self._seen = OrderedDict()
+        self._file_lines = 0
+        self._load()
+    
+    def _load(self):
+        """Carrega IDs já vistos do arquivo"""
+        if not self.index_file.exists():
+            return
+        
+        try:
+            with open(self.index_file, 'r') as f:
+                for line in f:
+                    message_id = line.strip()
+                    if message_id:
+                        self._remember(message_id)
+                        self._file_lines += 1
+            logger.info(f"Índice de mensagens carregado com {len(self._seen)} IDs")
+            
+            if self._file_lines > 2 * self.max_entries:
+                self._compact()
+        except Exception as e:
+            logger.error(f"Erro ao carregar índice de mensagens: {e}")
+    
+    def _remember(self, message_id: str):
+        """Insere ID no LRU respeitando o limite de memória"""
+        self._seen[message_id] = None
+        self._seen.move_to_end(message_id)
+        while len(self._seen) > self.max_entries:
+            self._seen.popitem(last=False)
+    
+    def _compact(self):
+        """Reescreve o arquivo apenas com os IDs mantidos em memória"""
+        tmp_file = self.index_file.with_suffix('.tmp')
+        with open(tmp_file, 'w') as f:
+            f.writelines(f"{message_id}\n" for message_id in self._seen)
+        os.replace(tmp_file, self.index_file)
+        self._file_lines = len(self._seen)
+        logger.debug(f"Índice de mensagens compactado para {self._file_lines} IDs")
+    
+    def __contains__(self, message_id: str) -> bool:
+        return message_id in self._seen
+    
+    def __len__(self) -> int:
+        return len(self._seen)
+    
+    def add(self, message_id: str, persist: bool = True) -> bool:
+        """
+        Registra ID. Retorna False se a mensagem já tinha sido vista.
+        Com persist=False o ID vale apenas para este processo.
+        """
+        if message_id in self._seen:
+            self._seen.move_to_end(message_id)
+            return False
+        
+        self._remember(message_id)
+        if not persist:
+            return True
+        try:
+            with open(self.index_file, 'a') as f:
+                f.write(f"{message_id}\n")
+            self._file_lines += 1
+            
+            if self._file_lines > 2 * self.max_entries:
+                self._compact()
+        except Exception as e:
+            logger.error(f"Erro ao persistir índice de mensagens: {e}")
+        return True
+
+class SelectorCache:
+    """
+    Cache persistente do seletor que funcionou por site e etapa. Várias
+    instâncias (watcher, executores do pool) podem gravar o mesmo arquivo: o
+    lock é único por arquivo no processo e cada gravação mescla o que está no disco.
+    """
+    
+    _file_locks: Dict[str, threading.Lock] = {}
+    _file_locks_guard = threading.Lock()
+    
+    def __init__(self, cache_file: str):
+        self.cache_file = Path(cache_file)
+        with SelectorCache._file_locks_guard:
+            self._lock = SelectorCache._file_locks.setdefault(str(self.cache_file.resolve()), threading.Lock())
+        self._cache = self._read()
+    
+    def _read(self) -> Dict[str, Dict[str, str]]:
+        """Lê cache do disco"""
+        if not self.cache_file.exists():
+            return {}
+        try:
+            with open(self.cache_file, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Cache de seletores inválido, ignorando: {e}")
+            return {}
+    
+    def get(self, site: str, step: str) -> Optional[str]:
+        """Retorna o seletor vencedor conhecido"""
+        return self._cache.get(site, {}).get(step)
+    
+    def ordered(self, site: str, step: str, candidates: List[str]) -> List[str]:
+        """Retorna os candidatos com o seletor vencedor em primeiro lugar"""
+        winner = self.get(site, step)
+        if winner not in candidates:
+            return list(candidates)
+        return [winner] + [selector for selector in candidates if selector != winner]
+    
+    def record(self, site: str, step: str, selector: str):
+        """Registra o seletor vencedor e persiste se mudou"""
+        if self.get(site, step) == selector:
+            return
+        
+        with self._lock:
+            self._cache.setdefault(site, {})[step] = selector
             try:
-                return func(*args, **kwargs)
+                # Mesclar com o arquivo atual (outras instâncias também gravam nele)
+                on_disk = self._read()
+                for disk_site, steps in on_disk.items():
+                    merged = dict(steps)
+                    merged.update(self._cache.get(disk_site, {}))
+                    self._cache[disk_site] = merged
+                
+                write_json_atomic(self.cache_file, self._cache, indent=2)
+                logger.debug(f"Seletor aprendido para {site}/{step}: {selector}")
             except Exception as e:
-                logger.warning(f"Tentativa {attempt + 1}/{max_retries} falhou: {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(delay + random.uniform(0, 2))  # Adiciona jitter
-                    continue
-                raise
-        return None
+                logger.error(f"Erro ao salvar cache de seletores: {e}")
+
+class CursorStore:
+    """
+    Cursor persistente por grupo: id e horário de envio da última mensagem
+    processada. advance() só altera a memória; flush() grava uma vez por lote.
+    """
+    
+    def __init__(self, cursor_file: str):
+        self.cursor_file = Path(cursor_file)
+        self._lock = threading.Lock()
+        self._cursors = self._read()
+        self._dirty = False
+    
+    def _read(self) -> Dict[str, Dict]:
+        """Lê cursores do disco"""
+        if not self.cursor_file.exists():
+            return {}
+        try:
+            with open(self.cursor_file, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Arquivo de cursores inválido, ignorando: {e}")
+            return {}
+    
+    def get(self, group: str) -> Optional[Dict]:
+        """Cursor salvo do grupo ({'mid', 'sent_at'})"""
+        return self._cursors.get(group)
+    
+    def mids(self) -> Dict[str, int]:
+        """Id da última mensagem processada por grupo"""
+        return {group: cursor['mid'] for group, cursor in self._cursors.items() if cursor.get('mid') is not None}
+    
+    def advance(self, group: str, mid: Optional[int], sent_at: Optional[float]) -> bool:
+        """Avança o cursor do grupo em memória (nunca retrocede); True se avançou"""
+        with self._lock:
+            current = self._cursors.get(group) or {}
+            if mid is None or (current.get('mid') is not None and mid <= current['mid']):
+                return False
+            self._cursors[group] = {'mid': mid, 'sent_at': sent_at}
+            self._dirty = True
+            return True
+    
+    def flush(self):
+        """Grava de forma atômica os cursores, se algum avançou desde a última gravação"""
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                write_json_atomic(self.cursor_file, self._cursors, indent=2)
+                self._dirty = False
+            except Exception as e:
+                logger.error(f"Erro ao salvar cursores: {e}")
+    
+    def save(self, group: str, mid: Optional[int], sent_at: Optional[float]):
+        """Avança o cursor do grupo e grava imediatamente"""
+        if self.advance(group, mid, sent_at):
+            self.flush()
+
+class RetryHelper:
+    """Helper para operações com retry (backoff exponencial de retry_policy)"""
+    
+    @staticmethod
+    def retry_operation(func, max_retries: int = 3, delay: int = 5, *args, deadline: Deadline = NO_DEADLINE, **kwargs):
+        """Executa operação com retry em caso de falha, sem passar do prazo do sinal (DeadlineExceeded)"""
+        policy = RetryPolicy('retry_operation', default=RetryRule(
+            max_attempts=max_retries, base_delay=delay, max_delay=max(delay, Config.RETRY_MAX_DELAY_SECONDS)))
+        return policy.run(func, *args, deadline=deadline, **kwargs)
+
+# Testa todos os seletores candidatos dentro da página e aguarda (via
+# MutationObserver) até que algum apareça ou o prazo expire. Retorna
+# [seletor, elemento] respeitando a ordem de prioridade, ou null.
+PROBE_SCRIPT = """
+const selectors = arguments[0];
+const timeoutMs = arguments[1];
+const requireClickable = arguments[2];
+const done = arguments[arguments.length - 1];
+
+const usable = (el) => {
+    if (!requireClickable) { return true; }
+    const rect = el.getBoundingClientRect();
+    const style = window.getComputedStyle(el);
+    return !el.disabled && rect.width > 0 && rect.height > 0 &&
+        style.visibility !== 'hidden' && style.display !== 'none';
+};
+const probe = () => {
+    for (const sel of selectors) {
+        let el = null;
+        try { el = document.querySelector(sel); } catch (e) { continue; }  // seletor inválido
+        if (el && usable(el)) { return [sel, el]; }
+    }
+    return null;
+};
+
+const found = probe();
+if (found || timeoutMs <= 0) { done(found); return; }
+
+let finished = false;
+const finish = (result) => {
+    if (finished) { return; }
+    finished = true;
+    observer.disconnect();
+    clearTimeout(timer);
+    done(result);
+};
+const observer = new MutationObserver(() => {
+    const result = probe();
+    if (result) { finish(result); }
+});
+const timer = setTimeout(() => finish(probe()), timeoutMs);
+observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true});
+"""
+
+# Resolve assim que document.readyState chega a "complete" (evento, sem polling)
+READY_STATE_SCRIPT = """
+const timeoutMs = arguments[0];
+const done = arguments[arguments.length - 1];
+if (document.readyState === 'complete') { done(true); return; }
+const timer = setTimeout(() => done(document.readyState === 'complete'), timeoutMs);
+document.addEventListener('readystatechange', () => {
+    if (document.readyState === 'complete') { clearTimeout(timer); done(true); }
+});
+"""
 
 class ElementWaiter:
     """Helper para aguardar elementos na página"""
     
-    def __init__(self, driver, timeout: int = 10):
+    def __init__(self, driver, timeout: int = 10, poll_frequency: float = None):
         self.driver = driver
-        self.wait = WebDriverWait(driver, timeout)
+        self.timeout = timeout
+        # Intervalo curto (padrão 50ms) em vez dos 0.5s do Selenium
+        self.poll_frequency = poll_frequency or Config.WAIT_POLL_INTERVAL_SECONDS
+        self.wait = WebDriverWait(driver, timeout, poll_frequency=self.poll_frequency)
+    
+    def _get_wait(self, timeout: float = None) -> WebDriverWait:
+        """Retorna WebDriverWait para o timeout informado"""
+        if timeout:
+            return WebDriverWait(self.driver, timeout, poll_frequency=self.poll_frequency)
+        return self.wait
+    
+    def wait_for_any(self, selectors: List[str], timeout: float = None,
+                     clickable: bool = False) -> Tuple[Optional[str], Optional[object]]:
+        """
+        Aguarda qualquer um dos seletores CSS aparecer, com um único prazo total.
+        Retorna (seletor, elemento) do primeiro candidato encontrado na ordem
+        da lista, ou (None, None) no timeout. timeout=0 apenas verifica o estado atual.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        
+        self.driver.set_script_timeout(timeout + 5)
+        result = self.driver.execute_async_script(PROBE_SCRIPT, list(selectors), int(timeout * 1000), clickable)
+        if not result:
+            return None, None
+        return result[0], result[1]
     
     def wait_for_element(self, by: By, value: str, timeout: int = None):
         """Aguarda elemento estar presente"""
-        if timeout:
-            wait = WebDriverWait(self.driver, timeout)
-        else:
-            wait = self.wait
-        return wait.until(EC.presence_of_element_located((by, value)))
+        return self._get_wait(timeout).until(EC.presence_of_element_located((by, value)))
     
     def wait_for_clickable(self, by: By, value: str, timeout: int = None):
         """Aguarda elemento estar clicável"""
-        if timeout:
-            wait = WebDriverWait(self.driver, timeout)
-        else:
-            wait = self.wait
-        return wait.until(EC.element_to_be_clickable((by, value)))
+        return self._get_wait(timeout).until(EC.element_to_be_clickable((by, value)))
     
     def wait_for_text_in_element(self, by: By, value: str, text: str, timeout: int = None):
         """Aguarda texto específico aparecer no elemento"""
-        if timeout:
-            wait = WebDriverWait(self.driver, timeout)
-        else:
-            wait = self.wait
-        return wait.until(EC.text_to_be_present_in_element((by, value), text))
+        return self._get_wait(timeout).until(EC.text_to_be_present_in_element((by, value), text))
+    
+    def wait_for_ready_state(self, timeout: float = None) -> bool:
+        """Aguarda document.readyState == "complete" e retorna assim que ocorrer"""
+        if timeout is None:
+            timeout = self.timeout
+        
+        try:
+            self.driver.set_script_timeout(timeout + 5)
+            return bool(self.driver.execute_async_script(READY_STATE_SCRIPT, int(timeout * 1000)))
+        except WebDriverException:
+            # Navegação durante o script descarta o documento; usar polling curto
+            try:
+                return self._get_wait(timeout).until(
+                    lambda driver: driver.execute_script("return document.readyState") == "complete"
+                )
+            except TimeoutException:
+                return False
 
 def human_like_delay(min_seconds: float = 1.0, max_seconds: float = 3.0):
     """Adiciona delay humanizado entre ações"""
     delay = random.uniform(min_seconds, max_seconds)
-    time.sleep(delay)
+    clock.sleep(delay)
+
+def capture_screenshot(driver) -> Tuple[str, str]:
+    """
+    Captura a tela (base64) e retorna também a extensão. No Chrome o JPEG é
+    comprimido pelo próprio navegador via CDP, com muito menos bytes a
+    transferir que o PNG; demais navegadores usam o PNG do WebDriver.
+    """
+    if Config.SCREENSHOT_FORMAT == 'jpeg' and hasattr(driver, 'execute_cdp_cmd'):
+        try:
+            result = driver.execute_cdp_cmd(
+                'Page.captureScreenshot', {'format': 'jpeg', 'quality': Config.SCREENSHOT_QUALITY}
+            )
+            return result['data'], '.jpg'
+        except Exception as e:
+            logger.debug(f"Captura JPEG via CDP indisponível, usando PNG: {e}")
+    return driver.get_screenshot_as_base64(), '.png'
 
 def take_screenshot(driver, filename: str = None):
-    """Captura screenshot para debug"""
-    if not filename:
-        timestamp = int(time.time())
-        filename = f"screenshot_{timestamp}.png"
-    
-    screenshot_path = Path('screenshots') / filename
+    """
+    Captura screenshot para debug. Só a captura ocorre na thread chamadora;
+    decodificação, gravação com nome único e retenção ficam com o artifact_writer.
+    Retorna o caminho em que o arquivo será gravado.
+    """
     try:
-        driver.save_screenshot(str(screenshot_path))
-        logger.info(f"Screenshot salvo: {screenshot_path}")
-        return str(screenshot_path)
+        data, extension = capture_screenshot(driver)
     except Exception as e:
-        logger.error(f"Erro ao salvar screenshot: {e}")
+        logger.error(f"Erro ao capturar screenshot: {e}")
         return None
+    
+    return artifact_writer.submit(data, Path(filename or "screenshot").stem + extension)
 
 def validate_bet_amount(amount: float, min_amount: float, max_amount: float) -> float:
     """Valida e ajusta valor da aposta dentro dos limites"""